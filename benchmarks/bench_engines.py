@@ -0,0 +1,63 @@
+"""
+Compare batch runs in series, on threads and on worker processes.
+
+Threads only beat processes when the interpreter lets them run Python code
+in parallel, so run this with both a regular and a free-threaded build of
+Python (e.g. `python3.13t`) to compare the engines on each.
+
+Run with `python -m benchmarks.bench_engines [--quick] [--jobs N]`.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import make_tree
+from npdocstring.batch import process_paths
+from npdocstring.discovery import iter_python_files
+
+
+def time_run(source: str, jobs: int, engine: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as directory:
+            # Each run documents a fresh copy of the tree.
+            tree = os.path.join(directory, "tree")
+            shutil.copytree(source, tree)
+            paths = list(iter_python_files(tree))
+            start = time.perf_counter()
+            results = list(process_paths(paths, jobs=jobs, engine=engine))
+            best = min(best, time.perf_counter() - start)
+        assert all(result.status == "processed" for result in results)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    flags = parser.parse_args()
+    n_files = 40 if flags.quick else 400
+    repeat = 1 if flags.quick else 3
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"python {sys.version.split()[0]}, GIL enabled: {gil_enabled}")
+    print(f"{n_files} files, {flags.jobs} jobs")
+    print()
+    print("engine          jobs   seconds  speedup")
+    with tempfile.TemporaryDirectory() as source:
+        make_tree(source, n_files, n_functions=40, n_classes=8, seed=0)
+        serial = time_run(source, 1, "processes", repeat)
+        print("{:<16}{:<7}{:>7.2f}{:>9.2f}".format("serial", 1, serial, 1))
+        for engine in ["threads", "processes"]:
+            seconds = time_run(source, flags.jobs, engine, repeat)
+            print(
+                "{:<16}{:<7}{:>7.2f}{:>9.2f}".format(
+                    engine, flags.jobs, seconds, serial / seconds
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
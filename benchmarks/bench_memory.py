@@ -0,0 +1,72 @@
+"""
+Measure the memory held by parsed files and the peak of batch runs.
+
+Batch runs release each syntax tree once its records are collected, so
+their peak should not grow with the number of files, except for the
+identifiers the interpreter interns while parsing.
+
+Run with `python -m benchmarks.bench_memory [--quick]`.
+"""
+import argparse
+import gc
+import tempfile
+import tracemalloc
+
+from benchmarks.corpus import make_module, make_tree
+from npdocstring.batch import iter_edits
+from npdocstring.npdocstring import parse_file
+
+
+def measure_retained(file_contents: list[str], keep_tree: bool) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    parsed = [
+        parse_file(content, keep_tree=keep_tree) for content in file_contents
+    ]
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del parsed
+    return retained
+
+
+def measure_batch_peak(directory: str) -> tuple[int, int]:
+    gc.collect()
+    tracemalloc.start()
+    n_edits = 0
+    for file_edits in iter_edits([directory]):
+        n_edits += len(file_edits.edits)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return n_edits, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quick", action="store_true")
+    flags = parser.parse_args()
+    n_modules = 5 if flags.quick else 20
+    file_contents = [make_module(seed=seed) for seed in range(n_modules)]
+    print("parsed files    kept tree  retained KiB/module")
+    for keep_tree in [True, False]:
+        retained = measure_retained(file_contents, keep_tree)
+        print(
+            "{:<16}{:<11}{:>19.0f}".format(
+                n_modules, str(keep_tree), retained / n_modules / 1024
+            )
+        )
+    print()
+    print("batch files     edits      peak KiB")
+    sizes = [50, 200] if flags.quick else [100, 1000, 4000]
+    for n_files in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            make_tree(
+                directory, n_files, n_functions=40, n_classes=8, seed=n_files
+            )
+            n_edits, peak = measure_batch_peak(directory)
+        print("{:<16}{:<11}{:>8.0f}".format(n_files, n_edits, peak / 1024))
+
+
+if __name__ == "__main__":
+    main()
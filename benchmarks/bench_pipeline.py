@@ -0,0 +1,130 @@
+"""
+Time every stage of the docstring generation pipeline.
+
+Run with `python -m benchmarks.bench_pipeline [--quick]`.
+"""
+import argparse
+import ast
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+from collections.abc import Callable
+from typing import Any
+
+from benchmarks.corpus import make_module, make_tree
+from npdocstring.npdocstring import (
+    LineIndex,
+    generate_class_docstring,
+    generate_function_docstring,
+    get_funclassdef_nodes,
+    integrate_docstrings,
+    parse_hint,
+    process_file,
+)
+
+
+def measure(func: Callable[[], Any], repeat: int = 3) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def collect_annotations(file_content: str) -> list[ast.AST]:
+    annotations = []
+    for node in ast.walk(ast.parse(file_content)):
+        if isinstance(node, ast.arg) and node.annotation is not None:
+            annotations.append(node.annotation)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if node.returns is not None:
+                annotations.append(node.returns)
+    return annotations
+
+
+def generate_docstrings(fcnodes: list[ast.AST]) -> list[str]:
+    docstrings = []
+    for node in fcnodes:
+        if isinstance(node, ast.ClassDef):
+            docstrings.append(generate_class_docstring(node))
+        else:
+            assert isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+            docstrings.append(generate_function_docstring(node))
+    return docstrings
+
+
+def bench_stages(file_content: str) -> dict[str, float]:
+    fcnodes = get_funclassdef_nodes(file_content)
+    annotations = collect_annotations(file_content)
+    docstrings = generate_docstrings(fcnodes)
+    line_index = LineIndex(file_content)
+    return {
+        "LineIndex": measure(lambda: LineIndex(file_content)),
+        "get_funclassdef_nodes": measure(
+            lambda: get_funclassdef_nodes(file_content)
+        ),
+        "parse_hint": measure(lambda: [parse_hint(a) for a in annotations]),
+        "generate_*_docstring": measure(lambda: generate_docstrings(fcnodes)),
+        "integrate_docstrings": measure(
+            lambda: integrate_docstrings(docstrings, line_index, fcnodes)
+        ),
+        "process_file": measure(lambda: process_file(file_content)),
+    }
+
+
+def bench_cli(n_files: int, jobs: int, **module_options) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source")
+        target = os.path.join(tmp, "target")
+        make_tree(source, n_files=n_files, **module_options)
+        best = float("inf")
+        for _ in range(3):
+            shutil.rmtree(target, ignore_errors=True)
+            shutil.copytree(source, target)
+            command = [sys.executable, "-m", "npdocstring", "-d", target]
+            command += ["-j", str(jobs)]
+            best = min(
+                best,
+                timeit.timeit(
+                    lambda: subprocess.run(
+                        command, check=True, stdout=subprocess.DEVNULL
+                    ),
+                    number=1,
+                ),
+            )
+        return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--hint-complexity", default=2, type=int)
+    parser.add_argument("--depth", default=0, type=int)
+    flags = parser.parse_args()
+    sizes = [(20, 4), (200, 40)] if flags.quick else [(100, 20), (2000, 400)]
+    for n_functions, n_classes in sizes:
+        file_content = make_module(
+            n_functions,
+            n_classes,
+            hint_complexity=flags.hint_complexity,
+            depth=flags.depth,
+        )
+        print(
+            "module: {} functions, {} classes, {} lines".format(
+                n_functions, n_classes, file_content.count("\n")
+            )
+        )
+        for stage, seconds in bench_stages(file_content).items():
+            print("  {:<24}{:>12.3f} ms".format(stage, seconds * 1e3))
+    n_files = 20 if flags.quick else 200
+    print("directory mode: {} files".format(n_files))
+    for jobs in sorted({1, os.cpu_count() or 1}):
+        seconds = bench_cli(
+            n_files, jobs, hint_complexity=flags.hint_complexity
+        )
+        print("  {:<24}{:>12.3f} ms".format(f"--jobs {jobs}", seconds * 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Compare process_file throughput with and without the lexical pre-scan.
+
+Run with `python -m benchmarks.bench_prescan`.
+"""
+import timeit
+
+from benchmarks.corpus import make_module
+from npdocstring.npdocstring import process_file
+
+
+def main() -> None:
+    print("corpus          prescan   lines/s")
+    for documented in [True, False]:
+        file_content = make_module(200, 40, documented=documented)
+        n_lines = file_content.count("\n")
+        for prescan in [False, True]:
+            timer = timeit.Timer(
+                lambda: process_file(file_content, prescan=prescan)
+            )
+            number, _ = timer.autorange()
+            best = min(timer.repeat(repeat=3, number=number)) / number
+            print(
+                "{:<16}{:<10}{:>8.0f}".format(
+                    "documented" if documented else "undocumented",
+                    str(prescan),
+                    n_lines / best,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
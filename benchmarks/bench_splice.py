@@ -0,0 +1,39 @@
+"""
+Check that splicing docstrings scales linearly with their number.
+
+Run with `python -m benchmarks.bench_splice`.
+"""
+import timeit
+
+from npdocstring.npdocstring import Edit, apply_edits
+
+SIZES = [1000, 2000, 4000, 8000, 16000]
+
+
+def make_case(n_insertions: int) -> tuple[str, list[Edit]]:
+    line = "def f(a: int) -> int:\n    return a\n\n\n"
+    text = line * n_insertions
+    docstring = '    """\n    FIXME\n    """\n'
+    edits = [
+        Edit(i * len(line) + line.index("\n") + 1, docstring)
+        for i in range(n_insertions)
+    ]
+    return text, edits
+
+
+def main() -> None:
+    print("insertions  total (ms)  per insertion (us)")
+    for n_insertions in SIZES:
+        text, edits = make_case(n_insertions)
+        timer = timeit.Timer(lambda: apply_edits(text, edits))
+        number, _ = timer.autorange()
+        best = min(timer.repeat(repeat=3, number=number)) / number
+        print(
+            "{:>10}  {:>10.2f}  {:>18.3f}".format(
+                n_insertions, best * 1e3, best * 1e6 / n_insertions
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
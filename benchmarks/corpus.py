@@ -0,0 +1,218 @@
+"""Deterministic generator of synthetic Python modules to benchmark on."""
+import os
+import random
+
+NAMES = ["int", "str", "float", "bool", "bytes", "pd.DataFrame"]
+
+
+def make_hint(rng: random.Random, complexity: int) -> str:
+    """
+    Generate a type hint nesting up to `complexity` subscripts.
+
+    Parameters
+    ----------
+    rng : random.Random
+        Source of randomness.
+    complexity : int
+        Maximum nesting depth of the hint.
+
+    Returns
+    -------
+    str
+        Source code of the hint.
+
+    """
+    if complexity <= 0:
+        return rng.choice(NAMES)
+    kind = rng.randrange(5)
+    inner = make_hint(rng, complexity - 1)
+    if kind == 0:
+        return "List[{}]".format(inner)
+    elif kind == 1:
+        return "Iterable[{}]".format(inner)
+    elif kind == 2:
+        return "Union[{}, {}]".format(inner, rng.choice(NAMES))
+    elif kind == 3:
+        return "Tuple[{}, {}]".format(inner, rng.choice(NAMES))
+    return "{} | None".format(inner)
+
+
+def make_function(
+    rng: random.Random,
+    name: str,
+    indent: str,
+    hint_complexity: int,
+    method: bool = False,
+    documented: bool = False,
+) -> list[str]:
+    n_args = rng.randrange(4)
+    args = ["self"] if method else []
+    for i in range(n_args):
+        arg = "arg{}: {}".format(i, make_hint(rng, hint_complexity))
+        if i == n_args - 1 and rng.random() < 0.5:
+            arg += " = {}".format(rng.choice(["None", "42", "'a'", "[]"]))
+        args.append(arg)
+    returns = make_hint(rng, hint_complexity)
+    lines = [
+        "{}def {}({}) -> {}:".format(indent, name, ", ".join(args), returns)
+    ]
+    if documented:
+        lines.append('{}    """Do something."""'.format(indent))
+    lines.append("{}    result = len({!r})".format(indent, name))
+    lines.append("{}    return result".format(indent))
+    return lines
+
+
+def make_class(
+    rng: random.Random,
+    name: str,
+    indent: str,
+    n_methods: int,
+    hint_complexity: int,
+    depth: int,
+    documented: bool = False,
+) -> list[str]:
+    lines = ["{}class {}:".format(indent, name)]
+    if documented:
+        lines.append('{}    """Hold something."""'.format(indent))
+    lines.append(
+        "{}    def __init__(self, a: {}, b: int = 0) -> None:".format(
+            indent, make_hint(rng, hint_complexity)
+        )
+    )
+    lines.append("{}        self.a = a".format(indent))
+    lines.append("{}        self.c = b + 1".format(indent))
+    for i in range(n_methods):
+        lines.append("")
+        lines.extend(
+            make_function(
+                rng,
+                "method_{}".format(i),
+                indent + "    ",
+                hint_complexity,
+                method=True,
+                documented=documented,
+            )
+        )
+    if depth > 0:
+        lines.append("")
+        lines.extend(
+            make_class(
+                rng,
+                name + "Inner",
+                indent + "    ",
+                n_methods,
+                hint_complexity,
+                depth - 1,
+                documented,
+            )
+        )
+    return lines
+
+
+def make_module(
+    n_functions: int = 100,
+    n_classes: int = 20,
+    n_methods: int = 5,
+    hint_complexity: int = 2,
+    depth: int = 0,
+    documented: bool = False,
+    seed: int = 0,
+) -> str:
+    """
+    Generate the source code of a synthetic module.
+
+    Parameters
+    ----------
+    n_functions : int, optional (default=100)
+        Number of top-level functions.
+    n_classes : int, optional (default=20)
+        Number of top-level classes.
+    n_methods : int, optional (default=5)
+        Number of methods per class, besides the constructor.
+    hint_complexity : int, optional (default=2)
+        Maximum nesting depth of the generated type hints.
+    depth : int, optional (default=0)
+        Number of classes nested in each top-level class.
+    documented : bool, optional (default=False)
+        Whether functions and classes already have docstrings.
+    seed : int, optional (default=0)
+        Seed making the module deterministic.
+
+    Returns
+    -------
+    str
+        Source code of the module.
+
+    """
+    rng = random.Random(seed)
+    lines = [
+        "from typing import Iterable, List, Tuple, Union",
+        "",
+        "import pandas as pd",
+    ]
+    for i in range(n_functions):
+        lines.extend(["", ""])
+        lines.extend(
+            make_function(
+                rng,
+                "function_{}".format(i),
+                "",
+                hint_complexity,
+                documented=documented,
+            )
+        )
+    for i in range(n_classes):
+        lines.extend(["", ""])
+        lines.extend(
+            make_class(
+                rng,
+                "Class{}".format(i),
+                "",
+                n_methods,
+                hint_complexity,
+                depth,
+                documented,
+            )
+        )
+    return "\n".join(lines) + "\n"
+
+
+def make_tree(
+    directory: str,
+    n_files: int = 100,
+    n_packages: int = 10,
+    seed: int = 0,
+    **module_options,
+) -> list[str]:
+    """
+    Write a package tree of synthetic modules.
+
+    Parameters
+    ----------
+    directory : str
+        Root directory of the tree, created if needed.
+    n_files : int, optional (default=100)
+        Number of modules.
+    n_packages : int, optional (default=10)
+        Number of sub-directories the modules are spread over.
+    seed : int, optional (default=0)
+        Seed making the tree deterministic.
+    **module_options
+        Options passed to `make_module`.
+
+    Returns
+    -------
+    list of str
+        Paths of the written modules.
+
+    """
+    paths = []
+    for i in range(n_files):
+        package = os.path.join(directory, "package_{}".format(i % n_packages))
+        os.makedirs(package, exist_ok=True)
+        path = os.path.join(package, "module_{}.py".format(i))
+        with open(path, "w") as f:
+            f.write(make_module(seed=seed + i, **module_options))
+        paths.append(path)
+    return paths
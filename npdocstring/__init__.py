@@ -1,8 +1,20 @@
 """Generate missing NumPy docstrings in your code, leveraging type hints."""
 from .__about__ import __version__
-from .npdocstring import process_file
+from .batch import FileEdits, iter_edits
+from .check import FileReport, MissingDocstring, iter_missing
+from .npdocstring import Edit, apply_edits, process_file, process_node
+from .stats import Stats
 
 __all__ = [
     "__version__",
+    "Edit",
+    "FileEdits",
+    "FileReport",
+    "MissingDocstring",
+    "Stats",
+    "apply_edits",
+    "iter_edits",
+    "iter_missing",
     "process_file",
+    "process_node",
 ]
@@ -1,16 +1,111 @@
 import argparse
+import json
 import os
 import sys
+from collections import Counter
+from collections.abc import Iterable
 
 import npdocstring
+from npdocstring.batch import ENGINES, iter_source_paths, process_paths
+from npdocstring.cache import DEFAULT_MAX_ENTRIES, ResultCache
+from npdocstring.check import (
+    REPORT_FORMATS,
+    FileReport,
+    check_file,
+    check_paths,
+    merge_json_reports,
+    summarize,
+)
+from npdocstring.diff import diff_file, iter_diffs
+from npdocstring.discovery import (
+    DEFAULT_EXCLUDES,
+    find_repository_root,
+    iter_python_files,
+)
+from npdocstring.gitdiff import LineRanges, get_changed_lines
+from npdocstring.journal import Journal
+from npdocstring.npdocstring import parse_file
+from npdocstring.pipeline import DEFAULT_QUEUE_DEPTH, process_paths_pipelined
+from npdocstring.shard import parse_shard, select_shard
+from npdocstring.stats import Stats, timed
+from npdocstring.stream import edit_to_dict, serve
 
-if __name__ == "__main__":
+STATUSES = ["processed", "unchanged", "cached", "failed"]
+
+
+def shard_type(spec: str) -> tuple[int, int]:
+    try:
+        return parse_shard(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def make_merge_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="npdocstring merge-reports",
+        description=(
+            "combine the JSON --check reports of several shards into one, "
+            "exiting with status 1 if a docstring is missing"
+        ),
+    )
+    parser.add_argument("reports", nargs="+", metavar="REPORT")
+    parser.add_argument(
+        "--report",
+        help="write the combined report to this path instead of stdout",
+        default=None,
+    )
+    parser.add_argument(
+        "--report-format",
+        help="format of the combined report",
+        choices=sorted(REPORT_FORMATS),
+        default="json",
+    )
+    return parser
+
+
+def merge_reports(argv: list[str]) -> int:
+    flags = make_merge_parser().parse_args(argv)
+    json_reports = []
+    for path in flags.reports:
+        with open(path, "r") as f:
+            json_reports.append(json.load(f))
+    reports = merge_json_reports(json_reports)
+    report = REPORT_FORMATS[flags.report_format](reports)
+    if flags.report is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(flags.report, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    summary = summarize(reports)
+    sys.stderr.write(
+        "{documented}/{total} functions and classes documented "
+        "({coverage:.1%}) in {files} files\n".format(**summary)
+    )
+    return int(summary["missing"] > 0 or summary["errors"] > 0)
+
+
+def make_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="npdocstring",
         description=(
             "generate missing numpy docstrings automatically "
             "in Python source files."
         ),
+        epilog=(
+            "run `npdocstring merge-reports --help` to combine the --check "
+            "reports of several shards."
+        ),
+    )
+    parser.add_argument(
+        "paths",
+        help=(
+            "files to rewrite in place (directories are searched "
+            "recursively), all in a single run"
+        ),
+        nargs="*",
+        metavar="PATH",
     )
     parser.add_argument(
         "--input",
@@ -22,14 +117,220 @@ if __name__ == "__main__":
         "-d",
         help="directory where to apply recursively.",
     )
+    parser.add_argument(
+        "--exclude",
+        help=(
+            "in directory mode, skip files and directories whose name or "
+            "relative path matches this glob (can be repeated); "
+            + ", ".join(DEFAULT_EXCLUDES)
+            + " are always skipped"
+        ),
+        action="append",
+        default=[],
+        metavar="GLOB",
+    )
+    parser.add_argument(
+        "--no-gitignore",
+        help="in directory mode, do not skip the paths ignored by git",
+        action="store_false",
+        dest="gitignore",
+    )
     parser.add_argument(
         "--indentation-spaces",
-        help="how many indentation spaces are used",
+        help=(
+            "deprecated and ignored, docstrings are indented like the body "
+            "they are inserted in"
+        ),
         default=4,
         type=int,
     )
-    flags = parser.parse_args()
-    if flags.dir is None:
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument(
+        "--line",
+        help=(
+            "only document the innermost function or class spanning this "
+            "line, printing the insertion as JSON"
+        ),
+        default=None,
+        type=int,
+    )
+    target.add_argument(
+        "--name",
+        help=(
+            "only document the function or class with this dotted qualified "
+            "name, printing the insertion as JSON"
+        ),
+        default=None,
+    )
+    parser.add_argument(
+        "--since",
+        help=(
+            "only document functions and classes of Python files changed "
+            "since this git revision (restricted to --dir if given)"
+        ),
+        default=None,
+        metavar="REV",
+    )
+    parser.add_argument(
+        "--staged",
+        help="only document functions and classes changed in the git index",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        help="number of workers in directory mode (default: CPUs)",
+        default=None,
+        type=int,
+    )
+    parser.add_argument(
+        "--cache-file",
+        help="skip files known to be up to date, as recorded in this file",
+        default=None,
+    )
+    parser.add_argument(
+        "--cache-size",
+        help="maximum number of entries kept in the cache file",
+        default=DEFAULT_MAX_ENTRIES,
+        type=int,
+    )
+    parser.add_argument(
+        "--engine",
+        help="run jobs in worker processes, or in threads, which only run in"
+        " parallel on free-threaded Python and cannot be combined with"
+        " --timeout (default: processes)",
+        choices=sorted(ENGINES),
+        default="processes",
+    )
+    parser.add_argument(
+        "--timeout",
+        help="seconds given to each file before it is reported as failed, "
+        "checked between Python operations",
+        default=None,
+        type=float,
+    )
+    parser.add_argument(
+        "--journal",
+        help=(
+            "append the files done to this file, and skip those it lists "
+            "as done and unchanged since, to resume an interrupted run"
+        ),
+        default=None,
+    )
+    parser.add_argument(
+        "--io-threads",
+        help=(
+            "read files ahead on this many threads and write them from a "
+            "background thread, for slow (e.g. network) filesystems"
+        ),
+        default=0,
+        type=int,
+    )
+    parser.add_argument(
+        "--queue-depth",
+        help=(
+            "with --io-threads, maximum number of files read ahead or "
+            "waiting to be written"
+        ),
+        default=DEFAULT_QUEUE_DEPTH,
+        type=int,
+    )
+    parser.add_argument(
+        "--backup",
+        help="in directory mode, save original files to <path>--",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--shard",
+        help=(
+            "only process the i-th of N shards of the files, split "
+            "deterministically into shards of similar total size"
+        ),
+        default=None,
+        type=shard_type,
+        metavar="i/N",
+    )
+    parser.add_argument(
+        "--diff",
+        help=(
+            "do not rewrite anything, print the unified diff adding the "
+            "missing docstrings instead"
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--check",
+        help=(
+            "do not rewrite anything, list the functions and classes "
+            "without docstring and exit with status 1 if there is any"
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--report",
+        help="with --check, also write a machine-readable report to this path",
+        default=None,
+    )
+    parser.add_argument(
+        "--report-format",
+        help="format of the --check report",
+        choices=sorted(REPORT_FORMATS),
+        default="json",
+    )
+    parser.add_argument(
+        "--stream",
+        help=(
+            "serve newline-delimited JSON requests from stdin, answering "
+            "each with one JSON line on stdout"
+        ),
+        action="store_true",
+    )
+    parser.add_argument(
+        "--daemon",
+        help=(
+            "serve the --stream protocol on a Unix socket created at this "
+            "path, keeping recently parsed files in memory"
+        ),
+        default=None,
+        metavar="SOCKET",
+    )
+    parser.add_argument(
+        "--profile",
+        help="print per-stage timings and counters to stderr",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--profile-json",
+        help="write per-stage timings and counters as JSON to this path",
+        default=None,
+    )
+    return parser
+
+
+def report_check(flags: argparse.Namespace, reports: list[FileReport]) -> int:
+    for report in reports:
+        if report.error is not None:
+            print(f"{report.path}: {report.error}")
+        for item in report.missing:
+            print(
+                f"{report.path}:{item.lineno}: "
+                f"{item.kind} {item.qualname} has no docstring"
+            )
+    summary = summarize(reports)
+    print(
+        "{documented}/{total} functions and classes documented "
+        "({coverage:.1%}) in {files} files".format(**summary)
+    )
+    if flags.report is not None:
+        make_report = REPORT_FORMATS[flags.report_format]
+        with open(flags.report, "w") as f:
+            json.dump(make_report(reports), f, indent=2)
+            f.write("\n")
+    return int(summary["missing"] > 0 or summary["errors"] > 0)
+
+
+def process_input(flags: argparse.Namespace, stats: Stats | None) -> int:
+    with timed(stats, "read"):
         if flags.input is not None:
             if not os.path.isfile(flags.input):
                 raise FileNotFoundError(flags.input)
@@ -38,24 +339,237 @@ if __name__ == "__main__":
                     file_content = f.read()
         else:
             file_content = sys.stdin.read()
-        new_file_content = npdocstring.process_file(
-            file_content, flags.indentation_spaces
+    path = "<stdin>" if flags.input is None else flags.input
+    if flags.check:
+        total, missing = check_file(file_content)
+        return report_check(flags, [FileReport(path, total, missing)])
+    if flags.diff:
+        sys.stdout.write(diff_file(file_content, path))
+        return 0
+    if flags.line is not None or flags.name is not None:
+        # Only the targeted node is described.
+        parsed = parse_file(file_content, stats, describe=False)
+        edit = npdocstring.process_node(
+            parsed, lineno=flags.line, qualname=flags.name
         )
+        json.dump(edit_to_dict(edit, parsed.line_index), sys.stdout)
+        sys.stdout.write("\n")
+        return 0
+    new_file_content = npdocstring.process_file(file_content, stats=stats)
+    with timed(stats, "write"):
         sys.stdout.write(new_file_content)
+    if stats is not None:
+        stats.counters["bytes_read"] += len(file_content.encode())
+        stats.counters["bytes_written"] += len(new_file_content.encode())
+    return 0
+
+
+def process_batch(
+    flags: argparse.Namespace,
+    paths: Iterable[str],
+    stats: Stats | None,
+    changes: dict[str, LineRanges] | None = None,
+    root: str | None = None,
+) -> int:
+    if flags.shard is not None:
+        if root is None:
+            root = find_repository_root(os.curdir) or os.curdir
+        index, count = flags.shard
+        with timed(stats, "shard"):
+            paths = select_shard(paths, index, count, root)
+    if flags.check:
+        with timed(stats, "check"):
+            reports = list(
+                check_paths(paths, flags.jobs, changes, flags.engine)
+            )
+        return report_check(flags, reports)
+    if flags.diff:
+        return print_diffs(flags, paths, changes)
+    cache = None
+    if flags.cache_file is not None:
+        cache = ResultCache(
+            flags.cache_file,
+            flags.cache_size,
+        )
+    journal = None
+    if flags.journal is not None:
+        journal = Journal(flags.journal)
+        paths = journal.filter(paths)
+    if flags.io_threads > 0:
+        results = process_paths_pipelined(
+            paths,
+            flags.jobs or os.cpu_count() or 1,
+            cache,
+            flags.backup,
+            stats,
+            changes,
+            flags.io_threads,
+            flags.queue_depth,
+            flags.timeout,
+            flags.engine,
+        )
     else:
-        if not os.path.isdir(flags.dir):
-            print("npdocstring: unknown directory", flags.dir)
-        else:
-            for root, dirs, files in os.walk(flags.dir):
-                for file in files:
-                    if file.endswith(".py"):
-                        path = os.path.join(*([root] + dirs + [file]))
-                        file_content = open(path).read()
-                        new_file_content = npdocstring.process_file(
-                            file_content, flags.indentation_spaces
-                        )
-                        with open(path + "--", "w") as f:
-                            f.write(file_content)
-                        with open(path, "w") as f:
-                            f.write(new_file_content)
-                        print(f"processed {path}")
+        results = process_paths(
+            paths,
+            flags.jobs,
+            cache,
+            flags.backup,
+            stats,
+            changes,
+            flags.timeout,
+            flags.engine,
+        )
+    counts: Counter[str] = Counter()
+    try:
+        for result in results:
+            if journal is not None:
+                journal.record(result)
+            counts[result.status] += 1
+            if result.status == "processed":
+                print(f"processed {result.path}")
+            elif result.status == "failed":
+                print(f"failed {result.path}: {result.error}", file=sys.stderr)
+    finally:
+        if journal is not None:
+            journal.close()
+        if cache is not None:
+            cache.save()
+    if journal is not None and journal.skipped > 0:
+        print(f"skipped {journal.skipped} files done in {flags.journal}")
+    print(
+        "npdocstring: {} processed, {} unchanged, {} cached, {} failed".format(
+            *(counts[status] for status in STATUSES)
+        ),
+        file=sys.stderr,
+    )
+    return int(counts["failed"] > 0)
+
+
+def print_diffs(
+    flags: argparse.Namespace,
+    paths: Iterable[str],
+    changes: dict[str, LineRanges] | None = None,
+) -> int:
+    jobs = flags.jobs if flags.jobs is not None else os.cpu_count() or 1
+    # Headers are relative to the top of the repository, where git applies
+    # patches from.
+    root = find_repository_root(flags.dir or os.curdir) or os.curdir
+    n_failed = 0
+    for file_diff in iter_diffs(paths, jobs, changes, flags.engine, root):
+        if file_diff.error is not None:
+            n_failed += 1
+            print(
+                f"failed {file_diff.path}: {file_diff.error}", file=sys.stderr
+            )
+        sys.stdout.write(file_diff.diff)
+    return int(n_failed > 0)
+
+
+def process_directory(flags: argparse.Namespace, stats: Stats | None) -> int:
+    if not os.path.isdir(flags.dir):
+        print("npdocstring: unknown directory", flags.dir)
+        return 1
+    paths = iter_python_files(
+        flags.dir, DEFAULT_EXCLUDES + tuple(flags.exclude), flags.gitignore
+    )
+    return process_batch(flags, paths, stats, root=flags.dir)
+
+
+def process_git_changes(flags: argparse.Namespace, stats: Stats | None) -> int:
+    changes = get_changed_lines(flags.since, flags.staged, flags.dir)
+    paths = sorted(path for path in changes if os.path.isfile(path))
+    if flags.dir is not None:
+        directory = os.path.realpath(flags.dir)
+        paths = [
+            path
+            for path in paths
+            if os.path.commonpath([directory, os.path.realpath(path)])
+            == directory
+        ]
+    root = find_repository_root(flags.dir or os.curdir)
+    return process_batch(flags, paths, stats, changes, root)
+
+
+def main(argv: list[str] | None = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["merge-reports"]:
+        return merge_reports(argv[1:])
+    parser = make_parser()
+    flags = parser.parse_args(argv)
+    if flags.paths and (
+        flags.staged
+        or any(
+            option is not None
+            for option in [
+                flags.input,
+                flags.dir,
+                flags.line,
+                flags.name,
+                flags.since,
+            ]
+        )
+    ):
+        parser.error(
+            "paths cannot be combined with --input, --dir, --line, --name, "
+            "--since or --staged"
+        )
+    if (flags.line is not None or flags.name is not None) and (
+        flags.check
+        or flags.diff
+        or flags.staged
+        or flags.dir is not None
+        or flags.since is not None
+    ):
+        parser.error(
+            "--line and --name cannot be combined with --check, --diff, "
+            "--dir, --since or --staged"
+        )
+    if flags.engine == "threads" and flags.timeout is not None:
+        parser.error("--timeout cannot be combined with --engine threads")
+    status = 0
+    stats = None
+    if flags.profile or flags.profile_json is not None:
+        stats = Stats()
+    if flags.daemon is not None:
+        # Unix sockets are not available on every platform.
+        from npdocstring.daemon import DaemonServer
+
+        try:
+            server = DaemonServer(flags.daemon)
+        except FileExistsError as e:
+            print(f"npdocstring: {e}", file=sys.stderr)
+            return 1
+        with server:
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+    elif flags.stream:
+        serve(sys.stdin, sys.stdout)
+    elif flags.since is not None or flags.staged:
+        status = process_git_changes(flags, stats)
+    elif flags.paths:
+        status = process_batch(
+            flags,
+            iter_source_paths(
+                flags.paths,
+                DEFAULT_EXCLUDES + tuple(flags.exclude),
+                flags.gitignore,
+            ),
+            stats,
+        )
+    elif flags.dir is None:
+        status = process_input(flags, stats)
+    else:
+        status = process_directory(flags, stats)
+    if stats is not None:
+        if flags.profile:
+            sys.stderr.write(stats.summary())
+        if flags.profile_json is not None:
+            stats.dump(flags.profile_json)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,687 @@
+"""Process many source files, optionally on a pool of worker processes."""
+import contextlib
+import functools
+import locale
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from collections import deque, namedtuple
+from collections.abc import Callable, Container, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from .cache import ResultCache, content_key
+from .discovery import DEFAULT_EXCLUDES, iter_python_files
+from .gitdiff import LineRanges
+from .npdocstring import get_file_edits, process_file
+from .stats import Stats, timed
+
+MIN_FILES_PER_JOB = 16
+IN_FLIGHT_PER_JOB = 4
+
+FileResult = namedtuple(
+    "FileResult",
+    ["path", "status", "key", "stats", "error"],
+    defaults=[None, None],
+)
+
+FileEdits = namedtuple("FileEdits", ["path", "content", "edits"])
+
+# Threads avoid pickling files and starting interpreters, but only run in
+# parallel on free-threaded builds of Python.
+ENGINES = {"processes": ProcessPoolExecutor, "threads": ThreadPoolExecutor}
+
+# Cache keys known to be clean, set in worker processes by their pool
+# initializer.
+_known_keys: Container[str] | None = None
+
+
+def _apply(func, args: tuple):
+    return func(*args)
+
+
+def _run_isolated(
+    func,
+    item,
+    on_broken: Callable,
+    initializer: Callable | None = None,
+    initargs: tuple = (),
+):
+    # A worker of its own, so that only an item crashing it fails.
+    with ProcessPoolExecutor(
+        max_workers=1, initializer=initializer, initargs=initargs
+    ) as executor:
+        try:
+            return executor.submit(func, item).result()
+        except BrokenProcessPool as e:
+            return on_broken(item, e)
+
+
+def ordered_map(
+    func,
+    jobs: int,
+    items: list,
+    *other_items,
+    engine: str = "processes",
+    on_broken: Callable | None = None,
+    initializer: Callable | None = None,
+    initargs: tuple = (),
+) -> Iterator:
+    """
+    Apply a function to the items of lists on a pool, yielding the results
+    in order.
+
+    Parameters
+    ----------
+    func : callable
+        Function applied to an item of each list.
+    jobs : int
+        Number of workers. With a single job or a single item, items are
+        processed in the calling process.
+    items : list
+        First arguments of the function.
+    *other_items : list
+        Other arguments of the function, in the order of `items`.
+    engine : {"processes", "threads"}, optional (default="processes")
+        Whether jobs are worker processes or threads.
+    on_broken : callable or None, optional (default=None)
+        Called with an item of `items` and the BrokenProcessPool error to
+        make its result when a worker dies processing it, see `lazy_map`.
+        If None, the error is raised.
+    initializer : callable or None, optional (default=None)
+        Called with `initargs` in each worker before its first item, but not
+        when items are processed in the calling process.
+    initargs : tuple, optional (default=())
+        Arguments of `initializer`.
+
+    Returns
+    -------
+    iterator
+        The result for each item.
+
+    """
+    if jobs <= 1 or len(items) <= 1:
+        yield from map(func, items, *other_items)
+        return
+
+    def on_broken_args(args: tuple, error: BrokenProcessPool):
+        assert on_broken is not None
+        return on_broken(args[0], error)
+
+    # Items are sent one by one rather than in chunks, so that a dead worker
+    # only takes the items it had not finished with it.
+    yield from lazy_map(
+        functools.partial(_apply, func),
+        jobs,
+        zip(items, *other_items),
+        engine,
+        on_broken_args if on_broken is not None else None,
+        initializer,
+        initargs,
+    )
+
+
+def lazy_map(
+    func,
+    jobs: int,
+    items: Iterable,
+    engine: str = "processes",
+    on_broken: Callable | None = None,
+    initializer: Callable | None = None,
+    initargs: tuple = (),
+) -> Iterator:
+    """
+    Apply a function to items on a pool, yielding the results in order.
+
+    Parameters
+    ----------
+    func : callable
+        Function applied to each item.
+    jobs : int
+        Number of workers. With a single job, items are processed in the
+        calling process.
+    items : iterable
+        Items consumed lazily, with a few per job processed ahead.
+    engine : {"processes", "threads"}, optional (default="processes")
+        Whether jobs are worker processes or threads.
+    on_broken : callable or None, optional (default=None)
+        Called with an item and the BrokenProcessPool error to make its
+        result when a worker dies processing it, for example killed by the
+        OS. The items in flight without a result when a worker dies are
+        processed again, each in a worker of its own with up to `jobs` at
+        once, to find the ones killing their worker, and the rest go on in
+        a new pool. If None, the error is raised.
+    initializer : callable or None, optional (default=None)
+        Called with `initargs` in each worker before its first item, but not
+        when items are processed in the calling process.
+    initargs : tuple, optional (default=())
+        Arguments of `initializer`.
+
+    Returns
+    -------
+    iterator
+        The result for each item.
+
+    """
+    if jobs <= 1:
+        yield from map(func, items)
+        return
+    items = iter(items)
+    while True:
+        with ENGINES[engine](
+            max_workers=jobs, initializer=initializer, initargs=initargs
+        ) as executor:
+            pending: deque = deque()
+            try:
+                for item in items:
+                    # Submitting to a broken pool raises, the item is kept
+                    # to be processed again.
+                    pending.append((item, None))
+                    pending[-1] = (item, executor.submit(func, item))
+                    if len(pending) >= jobs * IN_FLIGHT_PER_JOB:
+                        result = pending[0][1].result()
+                        pending.popleft()
+                        yield result
+                while pending:
+                    result = pending[0][1].result()
+                    pending.popleft()
+                    yield result
+                return
+            except BrokenProcessPool:
+                if on_broken is None:
+                    raise
+                broken = list(pending)
+                pending.clear()
+            finally:
+                for _, future in pending:
+                    if future is not None:
+                        future.cancel()
+        # Items are isolated in parallel, up to a worker per job.
+        with ThreadPoolExecutor(max_workers=jobs) as isolator:
+            retried = []
+            for item, future in broken:
+                if (
+                    future is not None
+                    and future.done()
+                    and not future.cancelled()
+                    and future.exception() is None
+                ):
+                    retried.append(future)
+                else:
+                    retried.append(
+                        isolator.submit(
+                            _run_isolated,
+                            func,
+                            item,
+                            on_broken,
+                            initializer,
+                            initargs,
+                        )
+                    )
+            for future in retried:
+                yield future.result()
+
+
+@contextlib.contextmanager
+def time_limit(seconds: float | None) -> Iterator[None]:
+    """
+    Raise TimeoutError in the `with` block once it has run for too long.
+
+    The limit relies on SIGALRM, so it is only enforced in the main thread
+    of platforms that have it, and not with the "threads" engine. The
+    error is raised between Python bytecodes, so a call running in C, such
+    as parsing a file, is only interrupted once it returns.
+
+    Parameters
+    ----------
+    seconds : float or None
+        Time budget of the block, unlimited if None.
+
+    """
+    if (
+        seconds is None
+        or not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def handle_alarm(signum, frame):
+        raise TimeoutError(f"took more than {seconds:g} seconds")
+
+    previous_handler = signal.signal(signal.SIGALRM, handle_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def describe_error(error: BaseException) -> str:
+    return "{}: {}".format(type(error).__name__, error)
+
+
+def iter_source_paths(
+    paths: Iterable[str],
+    exclude: Iterable[str] = DEFAULT_EXCLUDES,
+    gitignore: bool = True,
+) -> Iterator[str]:
+    """
+    Yield the given files and the Python files of the given directories.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Paths to files or directories, consumed lazily.
+    exclude : iterable of str, optional (default=DEFAULT_EXCLUDES)
+        Glob patterns excluding paths from the walk of the directories, see
+        `iter_python_files`.
+    gitignore : bool, optional (default=True)
+        Whether to skip the paths ignored by .gitignore files when walking
+        the directories.
+
+    Returns
+    -------
+    iterator of str
+        Paths to the files.
+
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            yield from iter_python_files(path, exclude, gitignore)
+        else:
+            yield path
+
+
+def decode_source(data: bytes) -> str:
+    """
+    Decode a file content like reading it in text mode does.
+
+    Parameters
+    ----------
+    data : bytes
+        Raw file content.
+
+    Returns
+    -------
+    str
+        The content decoded with the locale encoding, with universal
+        newlines.
+
+    """
+    file_content = data.decode(locale.getpreferredencoding(False))
+    if "\r" in file_content:
+        file_content = file_content.replace("\r\n", "\n").replace("\r", "\n")
+    return file_content
+
+
+def encode_source(file_content: str) -> bytes:
+    """
+    Encode a file content like writing it in text mode does.
+
+    Parameters
+    ----------
+    file_content : str
+        Content with "\n" line endings.
+
+    Returns
+    -------
+    bytes
+        The content encoded with the locale encoding, with the line
+        endings of the platform.
+
+    """
+    if os.linesep != "\n":
+        file_content = file_content.replace("\n", os.linesep)
+    return file_content.encode(locale.getpreferredencoding(False))
+
+
+def write_file_atomically(path: str, content: bytes) -> None:
+    """
+    Replace the content of a file without exposing a partial write.
+
+    The content is written to a temporary file in the same directory, which
+    then takes the place of `path` while keeping its permissions.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file.
+    content : bytes
+        New raw content of the file.
+
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=name + ".", dir=directory or ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def process_content(
+    data: bytes,
+    stats: Stats | None = None,
+    line_ranges: LineRanges | None = None,
+    key: str | None = None,
+) -> tuple[str, bytes, str | None]:
+    """
+    Generate the missing docstrings of the raw content of a file.
+
+    Parameters
+    ----------
+    data : bytes
+        Raw content of the file.
+    stats : Stats or None, optional (default=None)
+        Stats collecting the timings of the processing, if given.
+    line_ranges : list of tuple or None, optional (default=None)
+        Only document functions and classes overlapping these inclusive
+        ranges of line numbers.
+    key : str or None, optional (default=None)
+        The cache key of `data`, if already computed, reused when the
+        content is left unchanged.
+
+    Returns
+    -------
+    status : str
+        "processed" if docstrings were added, "unchanged" otherwise.
+    content : bytes
+        The raw content the file should be left with.
+    key : str or None
+        The cache key of that content, None when restricted to line
+        ranges.
+
+    """
+    file_content = decode_source(data)
+    new_file_content = process_file(
+        file_content, stats=stats, line_ranges=line_ranges
+    )
+    status = "unchanged"
+    encoded = data
+    if new_file_content != file_content:
+        status = "processed"
+        encoded = encode_source(new_file_content)
+    # The key is the hash of the file as left on disk, which is what the
+    # cache looks up.
+    if line_ranges is not None:
+        key = None
+    elif key is None or status == "processed":
+        with timed(stats, "hash"):
+            key = content_key(encoded)
+    return status, encoded, key
+
+
+def process_path(
+    path: str,
+    backup: bool = False,
+    profile: bool = False,
+    line_ranges: LineRanges | None = None,
+    timeout: float | None = None,
+    known_keys: Container[str] | None = None,
+) -> FileResult:
+    """
+    Generate the missing docstrings of a file and rewrite it in place.
+
+    The file is only written when docstrings were added to it. Errors are
+    reported in the result instead of being raised, so that a file that
+    cannot be processed does not stop a batch.
+
+    Parameters
+    ----------
+    path : str
+        Path to the Python source file.
+    backup : bool, optional (default=False)
+        Whether to copy the original content of rewritten files to
+        `path + "--"`.
+    profile : bool, optional (default=False)
+        Whether to collect the stats of the processing.
+    line_ranges : list of tuple or None, optional (default=None)
+        Only document functions and classes overlapping these inclusive
+        ranges of line numbers.
+    timeout : float or None, optional (default=None)
+        Seconds given to read and process the file before it fails.
+    known_keys : container of str or None, optional (default=None)
+        Cache keys of the contents known to be clean. A file with one of
+        these contents is not processed.
+
+    Returns
+    -------
+    FileResult
+        The path with its "processed", "unchanged", "cached" or "failed"
+        status, the cache key of its new content (None when restricted to
+        line ranges or failed), the collected stats and the error of failed
+        files.
+
+    """
+    start = time.perf_counter()
+    stats = Stats() if profile else None
+    try:
+        return _process_path(
+            path, backup, stats, line_ranges, timeout, known_keys
+        )
+    except Exception as e:
+        if stats is not None:
+            stats.counters["files_failed"] += 1
+        return FileResult(path, "failed", None, stats, describe_error(e))
+    finally:
+        if stats is not None:
+            stats.files[path] = time.perf_counter() - start
+
+
+def _process_path(
+    path: str,
+    backup: bool,
+    stats: Stats | None,
+    line_ranges: LineRanges | None,
+    timeout: float | None,
+    known_keys: Container[str] | None,
+) -> FileResult:
+    with time_limit(timeout):
+        with timed(stats, "read"):
+            with open(path, "rb") as f:
+                data = f.read()
+        key = None
+        if known_keys is not None:
+            with timed(stats, "cache"):
+                key = content_key(data)
+                hit = key in known_keys
+            if hit:
+                if stats is not None:
+                    stats.counters["files_cached"] += 1
+                return FileResult(path, "cached", key, stats)
+        status, encoded, key = process_content(data, stats, line_ranges, key)
+    if status == "processed":
+        with timed(stats, "write"):
+            if backup:
+                with open(path + "--", "wb") as f:
+                    f.write(data)
+            write_file_atomically(path, encoded)
+    if stats is not None:
+        stats.counters["files_" + status] += 1
+        stats.counters["bytes_read"] += len(data)
+        if status == "processed":
+            stats.counters["bytes_written"] += len(encoded)
+    return FileResult(path, status, key, stats)
+
+
+def _set_known_keys(known_keys: frozenset[str]) -> None:
+    global _known_keys
+    _known_keys = known_keys
+
+
+def _process_path_in_ranges(
+    path: str, line_ranges: LineRanges | None, **options
+) -> FileResult:
+    options.setdefault("known_keys", _known_keys)
+    return process_path(path, line_ranges=line_ranges, **options)
+
+
+def process_paths(
+    paths: Iterable[str],
+    jobs: int | None = None,
+    cache: ResultCache | None = None,
+    backup: bool = False,
+    stats: Stats | None = None,
+    changes: dict[str, LineRanges] | None = None,
+    timeout: float | None = None,
+    engine: str = "processes",
+) -> Iterator[FileResult]:
+    """
+    Process files, yielding a result for each once it has been processed.
+
+    Results are yielded in input order whatever the number of jobs, so that
+    output derived from them is deterministic. Files whose content is known
+    by the cache to need no docstring are not processed and are reported
+    with the "cached" status. Files that cannot be processed, or whose
+    worker dies, are reported with the "failed" status and do not stop the
+    others.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Paths to the Python source files.
+    jobs : int or None, optional (default=None)
+        Number of worker processes, defaults to the number of CPUs, but no
+        more than one per MIN_FILES_PER_JOB files. With a single job, files
+        are processed in the calling process.
+    cache : ResultCache or None, optional (default=None)
+        Cache of the contents left unchanged by processing, updated with
+        the content of every processed file.
+    backup : bool, optional (default=False)
+        Whether to keep a copy of the original content of rewritten files.
+    stats : Stats or None, optional (default=None)
+        Stats merged with those of every file, if given.
+    changes : dict or None, optional (default=None)
+        Ranges of changed line numbers by path. Only the functions and
+        classes overlapping them are documented.
+    timeout : float or None, optional (default=None)
+        Seconds given to read and process each file before it fails.
+    engine : {"processes", "threads"}, optional (default="processes")
+        Whether jobs are worker processes or threads.
+
+    Returns
+    -------
+    iterator of FileResult
+        The result for each path.
+
+    """
+    paths = list(paths)
+    if jobs is None:
+        # Starting workers is not worth it for a few files.
+        jobs = min(os.cpu_count() or 1, -(-len(paths) // MIN_FILES_PER_JOB))
+    options: dict[str, Any] = {
+        "backup": backup,
+        "profile": stats is not None,
+        "timeout": timeout,
+    }
+    initializer: Callable | None = None
+    initargs: tuple = ()
+    if cache is not None:
+        # Workers look their file up in the cache, so that it is read and
+        # hashed once, in parallel. Worker processes get a copy of the keys
+        # once, instead of with every file.
+        if engine == "processes" and jobs > 1 and len(paths) > 1:
+            initializer = _set_known_keys
+            initargs = (frozenset(cache.keys),)
+        else:
+            options["known_keys"] = cache
+    worker = functools.partial(_process_path_in_ranges, **options)
+    line_ranges = [
+        None if changes is None else changes.get(path, []) for path in paths
+    ]
+
+    def on_broken(path: str, error: Exception) -> FileResult:
+        file_stats = None
+        if stats is not None:
+            file_stats = Stats()
+            file_stats.counters["files_failed"] += 1
+        return FileResult(
+            path, "failed", None, file_stats, describe_error(error)
+        )
+
+    results = ordered_map(
+        worker,
+        jobs,
+        paths,
+        line_ranges,
+        engine=engine,
+        on_broken=on_broken,
+        initializer=initializer,
+        initargs=initargs,
+    )
+    for result in results:
+        if cache is not None and result.key is not None:
+            if result.status == "cached":
+                cache.lookup_key(result.key)
+            else:
+                cache.add(result.key)
+        if stats is not None:
+            stats.merge(result.stats)
+        yield result
+
+
+def edit_path(path: str) -> FileEdits:
+    """
+    Compute the edits inserting the missing docstrings of a file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the Python source file.
+
+    Returns
+    -------
+    FileEdits
+        The path, the content the edits apply to and the edits, empty when
+        nothing is missing.
+
+    """
+    with open(path, "r") as f:
+        file_content = f.read()
+    edits = get_file_edits(file_content)
+    return FileEdits(path, file_content, edits)
+
+
+def iter_edits(
+    paths: Iterable[str],
+    jobs: int = 1,
+    engine: str = "processes",
+) -> Iterator[FileEdits]:
+    """
+    Lazily compute the edits inserting the missing docstrings of files.
+
+    Files are only read as the iterator is consumed, with at most a few
+    files per job processed ahead, so that stopping early leaves the rest
+    untouched. Nothing is written: apply the edits of a file with
+    `apply_edits(file_edits.content, file_edits.edits)`.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Paths to Python source files, or to directories searched
+        recursively.
+    jobs : int, optional (default=1)
+        Number of worker processes. With a single job, files are processed
+        in the calling process.
+    engine : {"processes", "threads"}, optional (default="processes")
+        Whether jobs are worker processes or threads.
+
+    Returns
+    -------
+    iterator of FileEdits
+        The edits of each file lacking docstrings, in input order.
+
+    """
+    paths = iter_source_paths(paths)
+    for file_edits in lazy_map(edit_path, jobs, paths, engine):
+        if file_edits.edits:
+            yield file_edits
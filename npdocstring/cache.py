@@ -0,0 +1,146 @@
+"""On-disk cache of the files that npdocstring has nothing left to do on."""
+import hashlib
+import json
+import os
+
+from .__about__ import __version__
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+def content_key(content: bytes) -> str:
+    """
+    Hash file content together with the version.
+
+    Parameters
+    ----------
+    content : bytes
+        Raw file content.
+
+    Returns
+    -------
+    str
+        Hexadecimal digest identifying the content and version.
+
+    """
+    h = hashlib.sha256()
+    h.update("{}\0".format(__version__).encode())
+    h.update(content)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Set of content keys for which processing leaves the file unchanged.
+
+    Keys are kept in least recently used order and the oldest ones are
+    evicted on save so that at most `max_entries` are stored.
+
+    Parameters
+    ----------
+    path : str
+        Path to the JSON file backing the cache.
+    max_entries : int, optional (default=100000)
+        Maximum number of keys kept on disk.
+
+    Attributes
+    ----------
+    keys : dict
+        Cached keys, from least to most recently used.
+    hits : int
+        Number of lookups that found their key.
+
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.keys: dict[str, None] = {}
+        self.hits = 0
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        if isinstance(data, dict) and data.get("version") == __version__:
+            self.keys = dict.fromkeys(data.get("keys", []))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: str) -> None:
+        """Record `key` as the most recently used."""
+        self.keys.pop(key, None)
+        self.keys[key] = None
+
+    def lookup(self, path: str) -> bool:
+        """
+        Tell whether the current content of a file is known to be clean.
+
+        Parameters
+        ----------
+        path : str
+            Path to the file.
+
+        Returns
+        -------
+        bool
+            True if processing the file would leave it unchanged.
+
+        """
+        with open(path, "rb") as f:
+            return self.lookup_content(f.read())
+
+    def lookup_content(self, content: bytes) -> bool:
+        """
+        Tell whether a file content is known to be clean.
+
+        Parameters
+        ----------
+        content : bytes
+            The encoded content.
+
+        Returns
+        -------
+        bool
+            True if processing the content would leave it unchanged.
+
+        """
+        return self.lookup_key(content_key(content))
+
+    def lookup_key(self, key: str) -> bool:
+        """
+        Tell whether the content with a given key is known to be clean.
+
+        Parameters
+        ----------
+        key : str
+            The key of the content, from `content_key`.
+
+        Returns
+        -------
+        bool
+            True if processing the content would leave it unchanged.
+
+        """
+        if key not in self.keys:
+            return False
+        self.add(key)
+        self.hits += 1
+        return True
+
+    def save(self) -> None:
+        """Atomically write the most recently used keys to disk."""
+        keys = list(self.keys)
+        keys = keys[max(0, len(keys) - self.max_entries) :]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": __version__, "keys": keys}, f)
+        os.replace(tmp_path, self.path)
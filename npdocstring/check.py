@@ -0,0 +1,335 @@
+"""Report missing docstrings without rewriting any file."""
+import ast
+import os
+from collections import namedtuple
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from .__about__ import __version__
+from .batch import describe_error, iter_source_paths, lazy_map, ordered_map
+from .gitdiff import LineRanges
+from .npdocstring import collect_funclassdefs
+
+MissingDocstring = namedtuple(
+    "MissingDocstring", ["lineno", "qualname", "kind"]
+)
+
+FileReport = namedtuple(
+    "FileReport", ["path", "total", "missing", "error"], defaults=[None]
+)
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_RULE_ID = "missing-docstring"
+
+
+def check_file(
+    file_content: str, line_ranges: LineRanges | None = None
+) -> tuple[int, list[MissingDocstring]]:
+    """
+    Find the functions and classes of a file lacking a docstring.
+
+    Nodes are discovered like `process_file` does, but no docstring is
+    rendered.
+
+    Parameters
+    ----------
+    file_content : str
+        Content of the Python source file.
+    line_ranges : list of tuple or None, optional (default=None)
+        Only consider functions and classes overlapping these inclusive
+        ranges of line numbers.
+
+    Returns
+    -------
+    total : int
+        Number of functions and classes considered.
+    missing : list of MissingDocstring
+        Those lacking a docstring, in source order.
+
+    """
+    records = collect_funclassdefs(
+        ast.parse(file_content), describe=False, line_ranges=line_ranges
+    )
+    missing = [
+        MissingDocstring(record.lineno, record.qualname, record.kind)
+        for record in records
+        if not record.has_docstring
+    ]
+    missing.sort()
+    return len(records), missing
+
+
+def check_path(path: str, line_ranges: LineRanges | None = None) -> FileReport:
+    """
+    Find the functions and classes of a file lacking a docstring.
+
+    Parameters
+    ----------
+    path : str
+        Path to the Python source file.
+    line_ranges : list of tuple or None, optional (default=None)
+        Only consider functions and classes overlapping these inclusive
+        ranges of line numbers.
+
+    Returns
+    -------
+    FileReport
+        The number of functions and classes considered and those lacking a
+        docstring, or the error if the file could not be parsed.
+
+    """
+    try:
+        with open(path, "r") as f:
+            file_content = f.read()
+        total, missing = check_file(file_content, line_ranges)
+    except (OSError, UnicodeDecodeError, SyntaxError, ValueError) as e:
+        return FileReport(path, 0, [], "{}: {}".format(type(e).__name__, e))
+    return FileReport(path, total, missing)
+
+
+def _broken_report(path: str, error: Exception) -> FileReport:
+    return FileReport(path, 0, [], describe_error(error))
+
+
+def check_paths(
+    paths: Iterable[str],
+    jobs: int | None = None,
+    changes: dict[str, LineRanges] | None = None,
+    engine: str = "processes",
+) -> Iterator[FileReport]:
+    """
+    Check files, yielding their reports in input order.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Paths to the Python source files.
+    jobs : int or None, optional (default=None)
+        Number of worker processes, defaults to the number of CPUs.
+    changes : dict or None, optional (default=None)
+        Ranges of changed line numbers by path. Only the functions and
+        classes overlapping them are considered.
+    engine : {"processes", "threads"}, optional (default="processes")
+        Whether jobs are worker processes or threads.
+
+    Returns
+    -------
+    iterator of FileReport
+        The report for each path.
+
+    """
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    paths = list(paths)
+    line_ranges = [
+        None if changes is None else changes.get(path, []) for path in paths
+    ]
+    yield from ordered_map(
+        check_path,
+        jobs,
+        paths,
+        line_ranges,
+        engine=engine,
+        on_broken=_broken_report,
+    )
+
+
+def iter_missing(
+    paths: Iterable[str], jobs: int = 1, engine: str = "processes"
+) -> Iterator[FileReport]:
+    """
+    Lazily find the functions and classes of files lacking a docstring.
+
+    Files are only read as the iterator is consumed, with at most a few
+    files per job checked ahead.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Paths to Python source files, or to directories searched
+        recursively.
+    jobs : int, optional (default=1)
+        Number of worker processes. With a single job, files are checked in
+        the calling process.
+    engine : {"processes", "threads"}, optional (default="processes")
+        Whether jobs are worker processes or threads.
+
+    Returns
+    -------
+    iterator of FileReport
+        The report of each file lacking docstrings or failing to parse, in
+        input order.
+
+    """
+    paths = iter_source_paths(paths)
+    for report in lazy_map(check_path, jobs, paths, engine, _broken_report):
+        if report.missing or report.error is not None:
+            yield report
+
+
+def summarize(reports: Iterable[FileReport]) -> dict[str, Any]:
+    """
+    Count the documented functions and classes of checked files.
+
+    Parameters
+    ----------
+    reports : iterable of FileReport
+        Reports of the checked files.
+
+    Returns
+    -------
+    dict
+        Numbers of `files`, of files with `errors`, and of `total`,
+        `documented` and `missing` functions and classes, with the
+        documented ratio as `coverage` (1.0 when there is none).
+
+    """
+    summary: dict[str, float] = dict.fromkeys(
+        ["files", "errors", "total", "documented", "missing"], 0
+    )
+    for report in reports:
+        summary["files"] += 1
+        summary["errors"] += report.error is not None
+        summary["total"] += report.total
+        summary["missing"] += len(report.missing)
+    summary["documented"] = summary["total"] - summary["missing"]
+    summary["coverage"] = (
+        summary["documented"] / summary["total"] if summary["total"] else 1.0
+    )
+    return summary
+
+
+def make_json_report(reports: list[FileReport]) -> dict[str, Any]:
+    """
+    Describe the checked files for JSON serialization.
+
+    Parameters
+    ----------
+    reports : list of FileReport
+        Reports of the checked files.
+
+    Returns
+    -------
+    dict
+        The `version` of npdocstring, the coverage counts and missing
+        docstrings of each of the `files`, and their `summary`.
+
+    """
+    files = []
+    for report in reports:
+        entry: dict[str, Any] = {
+            "path": report.path,
+            "total": report.total,
+            "documented": report.total - len(report.missing),
+            "missing": [item._asdict() for item in report.missing],
+        }
+        if report.error is not None:
+            entry["error"] = report.error
+        files.append(entry)
+    return {
+        "version": __version__,
+        "files": files,
+        "summary": summarize(reports),
+    }
+
+
+def make_sarif_report(reports: list[FileReport]) -> dict[str, Any]:
+    """
+    Describe the missing docstrings as a SARIF 2.1.0 log.
+
+    Parameters
+    ----------
+    reports : list of FileReport
+        Reports of the checked files.
+
+    Returns
+    -------
+    dict
+        A log with a single run, holding a result for each missing
+        docstring and an error result for each file that could not be
+        checked.
+
+    """
+    results = []
+    for report in reports:
+        artifact = {"artifactLocation": {"uri": report.path}}
+        if report.error is not None:
+            results.append(
+                {
+                    "ruleId": SARIF_RULE_ID,
+                    "level": "error",
+                    "message": {"text": report.error},
+                    "locations": [{"physicalLocation": artifact}],
+                }
+            )
+        for item in report.missing:
+            results.append(
+                {
+                    "ruleId": SARIF_RULE_ID,
+                    "level": "warning",
+                    "message": {
+                        "text": "{} {} has no docstring".format(
+                            item.kind, item.qualname
+                        )
+                    },
+                    "locations": [
+                        {
+                            "physicalLocation": dict(
+                                artifact, region={"startLine": item.lineno}
+                            ),
+                            "logicalLocations": [
+                                {
+                                    "fullyQualifiedName": item.qualname,
+                                    "kind": item.kind,
+                                }
+                            ],
+                        }
+                    ],
+                }
+            )
+    driver = {
+        "name": "npdocstring",
+        "version": __version__,
+        "rules": [
+            {
+                "id": SARIF_RULE_ID,
+                "shortDescription": {
+                    "text": "function or class without a docstring"
+                },
+            }
+        ],
+    }
+    return {
+        "$schema": SARIF_SCHEMA,
+        "version": "2.1.0",
+        "runs": [{"tool": {"driver": driver}, "results": results}],
+    }
+
+
+def merge_json_reports(json_reports: Iterable[dict]) -> list[FileReport]:
+    """
+    Combine JSON reports, such as those of the shards of a run.
+
+    Parameters
+    ----------
+    json_reports : iterable of dict
+        Reports made by `make_json_report`.
+
+    Returns
+    -------
+    list of FileReport
+        Reports of every checked file sorted by path, the last report
+        winning for a file checked more than once.
+
+    """
+    reports = {}
+    for json_report in json_reports:
+        for entry in json_report["files"]:
+            missing = [MissingDocstring(**item) for item in entry["missing"]]
+            reports[entry["path"]] = FileReport(
+                entry["path"], entry["total"], missing, entry.get("error")
+            )
+    return [reports[path] for path in sorted(reports)]
+
+
+REPORT_FORMATS = {"json": make_json_report, "sarif": make_sarif_report}
@@ -0,0 +1,194 @@
+"""
+Local daemon answering docstring generation requests on a Unix socket.
+
+Connections speak the newline-delimited JSON protocol of
+`npdocstring.stream`. Parsed files are kept in a small LRU cache keyed by
+content, so that repeated requests on a buffer skip parsing and indexing.
+"""
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+from typing import Any
+
+from .cache import content_key
+from .npdocstring import ParsedFile, parse_file
+from .stream import serve
+
+DEFAULT_MAX_PARSED = 32
+
+
+class ParsedFileCache:
+    """
+    Least recently used cache of parsed files, keyed by content.
+
+    Parameters
+    ----------
+    max_entries : int, optional (default=32)
+        Maximum number of parsed files kept in memory.
+
+    Attributes
+    ----------
+    entries : dict
+        Parsed files by content key, from least to most recently used.
+    hits : int
+        Number of lookups served from the cache.
+
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_PARSED) -> None:
+        self.max_entries = max_entries
+        self.entries: dict[str, ParsedFile] = {}
+        self.hits = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def parse(self, file_content: str) -> ParsedFile:
+        """Parse `file_content`, or return its cached parsed file."""
+        key = content_key(file_content.encode())
+        with self.lock:
+            parsed = self.entries.pop(key, None)
+            if parsed is not None:
+                self.hits += 1
+                self.entries[key] = parsed
+                return parsed
+        parsed = parse_file(file_content)
+        with self.lock:
+            self.entries[key] = parsed
+            while len(self.entries) > self.max_entries:
+                del self.entries[next(iter(self.entries))]
+        return parsed
+
+
+def remove_stale_socket(socket_path: str) -> None:
+    """
+    Remove the socket left by a daemon that is no longer running.
+
+    Parameters
+    ----------
+    socket_path : str
+        Path to the socket.
+
+    Raises
+    ------
+    FileExistsError
+        If the path is not a socket, or a daemon still listens on it.
+
+    """
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{socket_path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        os.unlink(socket_path)
+        return
+    finally:
+        probe.close()
+    raise FileExistsError(f"a daemon is already listening on {socket_path}")
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server sharing a parsed file cache across connections.
+
+    Parameters
+    ----------
+    socket_path : str
+        Path where the socket is created, replacing the socket of a daemon
+        that is no longer running. The socket is removed on close.
+    max_parsed : int, optional (default=32)
+        Maximum number of parsed files kept in memory.
+
+    Attributes
+    ----------
+    cache : ParsedFileCache
+        Parsed files shared by every connection.
+
+    Raises
+    ------
+    FileExistsError
+        If the path is taken by anything but a stale socket.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: str,
+        max_parsed: int = DEFAULT_MAX_PARSED,
+    ) -> None:
+        remove_stale_socket(socket_path)
+        self.socket_path = socket_path
+        self.socket_id: tuple[int, int] | None = None
+        self.cache = ParsedFileCache(max_parsed)
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, DaemonHandler)
+        finally:
+            os.umask(old_umask)
+
+    def server_bind(self) -> None:
+        super().server_bind()
+        st = os.lstat(self.socket_path)
+        self.socket_id = st.st_dev, st.st_ino
+
+    def server_close(self) -> None:
+        super().server_close()
+        # Another daemon may have replaced the socket since.
+        try:
+            st = os.lstat(self.socket_path)
+        except FileNotFoundError:
+            return
+        if (st.st_dev, st.st_ino) == self.socket_id:
+            os.unlink(self.socket_path)
+
+
+class DaemonHandler(socketserver.BaseRequestHandler):
+    """Serve the requests of a single connection."""
+
+    server: DaemonServer
+
+    def handle(self) -> None:
+        stdin = self.request.makefile("r", encoding="utf-8")
+        stdout = self.request.makefile("w", encoding="utf-8")
+        with stdin, stdout:
+            serve(
+                stdin,
+                stdout,
+                self.server.cache.parse,
+            )
+
+
+def request(socket_path: str, payload: dict[str, Any]) -> dict[str, Any]:
+    """
+    Send a single request to a running daemon and wait for its response.
+
+    Parameters
+    ----------
+    socket_path : str
+        Path to the socket of the daemon.
+    payload : dict
+        The request.
+
+    Returns
+    -------
+    dict
+        The response.
+
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        with sock.makefile("rw", encoding="utf-8") as f:
+            f.write(json.dumps(payload) + "\n")
+            f.flush()
+            return json.loads(f.readline())
@@ -0,0 +1,212 @@
+"""Describe docstring insertions as unified diffs instead of applying them."""
+import os
+from collections import namedtuple
+from collections.abc import Iterable, Iterator
+
+from .batch import describe_error, lazy_map
+from .gitdiff import LineRanges
+from .npdocstring import (
+    Edit,
+    LineIndex,
+    get_parsed_file_edits,
+    may_lack_docstrings,
+    parse_file,
+)
+
+DIFF_CONTEXT = 3
+NO_NEWLINE = "\n\\ No newline at end of file\n"
+
+FileDiff = namedtuple("FileDiff", ["path", "diff", "error"], defaults=[None])
+
+
+def iter_context_lines(
+    line_index: LineIndex, first: int, last: int
+) -> Iterator[str]:
+    for i in range(first - 1, last):
+        line = line_index.line(i)
+        yield " " + line
+        if not line.endswith(("\n", "\r")):
+            yield NO_NEWLINE
+
+
+def iter_inserted_lines(text: str, newline: str) -> Iterator[str]:
+    # Docstrings are generated with "\n" line endings only.
+    for line in text.split("\n")[:-1]:
+        yield "+" + line + newline
+
+
+def format_range(start: int, length: int) -> str:
+    if length == 1:
+        return str(start)
+    if length == 0:
+        start -= 1
+    return f"{start},{length}"
+
+
+def iter_unified_diff(
+    path: str,
+    line_index: LineIndex,
+    edits: list[Edit],
+    context: int = DIFF_CONTEXT,
+) -> Iterator[str]:
+    """
+    Describe insertions at the start of lines as a unified diff.
+
+    Only the lines around the insertions are read, so that the cost does
+    not depend on the size of the file. Inserted lines end like the line
+    they are inserted before.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file in the diff headers, prefixed with "a/" and "b/".
+    line_index : LineIndex
+        Index of the original content.
+    edits : list of Edit
+        Insertions, each at the offset of a line start.
+    context : int, optional (default=3)
+        Number of unchanged lines around each insertion.
+
+    Returns
+    -------
+    iterator of str
+        Chunks of the diff, empty if there is no edit.
+
+    """
+    if not edits:
+        return
+    n_lines = len(line_index)
+    # Insertions as (line number inserted before, text), grouped in hunks
+    # whose context overlaps.
+    hunks: list[list[tuple[int, str]]] = []
+    for edit in sorted(edits, key=lambda edit: edit.offset):
+        lineno = line_index.lineno(edit.offset)
+        if hunks and lineno - hunks[-1][-1][0] <= 2 * context:
+            hunks[-1].append((lineno, edit.text))
+        else:
+            hunks.append([(lineno, edit.text)])
+    path = path.replace(os.sep, "/").lstrip("/")
+    yield f"--- a/{path}\n+++ b/{path}\n"
+    offset = 0
+    for hunk in hunks:
+        first = max(1, hunk[0][0] - context)
+        last = min(n_lines, hunk[-1][0] + context - 1)
+        n_old = last - first + 1
+        n_new = n_old + sum(text.count("\n") for _, text in hunk)
+        yield "@@ -{} +{} @@\n".format(
+            format_range(first, n_old), format_range(first + offset, n_new)
+        )
+        offset += n_new - n_old
+        position = first
+        for lineno, text in hunk:
+            yield from iter_context_lines(line_index, position, lineno - 1)
+            line = line_index.line(lineno - 1)
+            newline = line[len(line.rstrip("\r\n")) :] or "\n"
+            yield from iter_inserted_lines(text, newline)
+            position = lineno
+        yield from iter_context_lines(line_index, position, last)
+
+
+def diff_file(
+    file_content: str,
+    path: str,
+    line_ranges: LineRanges | None = None,
+) -> str:
+    """
+    Make the unified diff adding the missing docstrings of a file.
+
+    Parameters
+    ----------
+    file_content : str
+        Content of the Python source file.
+    path : str
+        Path of the file in the diff headers.
+    line_ranges : list of tuple or None, optional (default=None)
+        Only document functions and classes overlapping these inclusive
+        ranges of line numbers.
+
+    Returns
+    -------
+    str
+        The diff, empty if no docstring is missing.
+
+    """
+    if not may_lack_docstrings(file_content):
+        return ""
+    parsed = parse_file(file_content, line_ranges=line_ranges, keep_tree=False)
+    edits = get_parsed_file_edits(parsed)
+    return "".join(iter_unified_diff(path, parsed.line_index, edits))
+
+
+def get_header_path(path: str, root: str | None = None) -> str:
+    relpath = os.path.relpath(path, root or os.curdir)
+    # Files outside the root keep their absolute path.
+    if relpath == os.pardir or relpath.startswith(os.pardir + os.sep):
+        return os.path.abspath(path)
+    return relpath
+
+
+def diff_path(job: tuple[str, str, LineRanges | None]) -> FileDiff:
+    path, header_path, line_ranges = job
+    try:
+        # Line endings are kept for the context lines to match the file.
+        with open(path, "r", newline="") as f:
+            file_content = f.read()
+        diff = diff_file(file_content, header_path, line_ranges)
+    except Exception as e:
+        return FileDiff(path, "", describe_error(e))
+    return FileDiff(path, diff)
+
+
+def _broken_diff(
+    job: tuple[str, str, LineRanges | None], error: Exception
+) -> FileDiff:
+    return FileDiff(job[0], "", describe_error(error))
+
+
+def iter_diffs(
+    paths: Iterable[str],
+    jobs: int = 1,
+    changes: dict[str, LineRanges] | None = None,
+    engine: str = "processes",
+    root: str | None = None,
+) -> Iterator[FileDiff]:
+    """
+    Lazily make the unified diffs adding the missing docstrings of files.
+
+    The paths in the diff headers are relative to `root`, so that the diffs
+    apply with `git apply` or `patch -p1` from there.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Paths to the Python source files.
+    jobs : int, optional (default=1)
+        Number of worker processes. With a single job, files are processed
+        in the calling process.
+    changes : dict or None, optional (default=None)
+        Ranges of changed line numbers by path. Only the functions and
+        classes overlapping them are documented.
+    engine : {"processes", "threads"}, optional (default="processes")
+        Whether jobs are worker processes or threads.
+    root : str or None, optional (default=None)
+        Directory the paths in the diff headers are relative to, the
+        current directory if None. Files outside of it keep their absolute
+        path.
+
+    Returns
+    -------
+    iterator of FileDiff
+        The diff of each file, empty when it needs no change, or the error
+        that prevented making it, in input order.
+
+    """
+    items = (
+        (
+            path,
+            get_header_path(path, root),
+            None if changes is None else changes.get(path, []),
+        )
+        for path in paths
+    )
+    yield from lazy_map(diff_path, jobs, items, engine, _broken_diff)
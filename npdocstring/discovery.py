@@ -0,0 +1,236 @@
+"""Find the Python source files of a directory tree."""
+import fnmatch
+import os
+import re
+from collections.abc import Iterable, Iterator
+
+DEFAULT_EXCLUDES = (
+    ".git",
+    ".hg",
+    ".svn",
+    ".venv",
+    "venv",
+    ".tox",
+    ".nox",
+    ".eggs",
+    "*.egg-info",
+    "__pycache__",
+    ".mypy_cache",
+    ".pytest_cache",
+    "node_modules",
+    "build",
+    "dist",
+)
+
+# An ignore rule: pattern, whether it is negated, whether it only matches
+# directories and the directory it is relative to ("" for the top).
+IgnoreRule = tuple[re.Pattern, bool, bool, str]
+
+
+def translate_gitignore_pattern(pattern: str) -> re.Pattern:
+    """
+    Compile a .gitignore pattern into a regular expression.
+
+    Parameters
+    ----------
+    pattern : str
+        The pattern, without negation nor trailing slash.
+
+    Returns
+    -------
+    re.Pattern
+        Expression matching the slash separated paths, relative to the
+        directory of the .gitignore file, that the pattern matches.
+
+    """
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2 :]:
+            end = pattern.index("]", i + 2)
+            klass = pattern[i + 1 : end]
+            if klass.startswith("!"):
+                klass = "^" + klass[1:]
+            parts.append("[" + klass.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    prefix = "" if anchored else "(?:.*/)?"
+    return re.compile(prefix + "".join(parts) + r"\Z", re.DOTALL)
+
+
+def read_gitignore(path: str, base: str) -> list[IgnoreRule]:
+    """
+    Read the rules of a .gitignore file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the .gitignore file.
+    base : str
+        Slash separated path of its directory relative to the top of the
+        walk, "" for the top itself.
+
+    Returns
+    -------
+    list of tuple
+        The rules, in file order.
+
+    """
+    rules: list[IgnoreRule] = []
+    try:
+        with open(path, "r", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+    for line in lines:
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if line:
+            rules.append(
+                (translate_gitignore_pattern(line), negated, dir_only, base)
+            )
+    return rules
+
+
+def is_ignored(rules: list[IgnoreRule], relpath: str, is_dir: bool) -> bool:
+    ignored = False
+    for regex, negated, dir_only, base in rules:
+        if dir_only and not is_dir:
+            continue
+        if base:
+            if not relpath.startswith(base + "/"):
+                continue
+            path = relpath[len(base) + 1 :]
+        else:
+            path = relpath
+        if regex.match(path):
+            ignored = not negated
+    return ignored
+
+
+def compile_excludes(exclude: Iterable[str]) -> re.Pattern | None:
+    patterns = [fnmatch.translate(pattern) for pattern in exclude]
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+def join_relpath(parent: str, name: str) -> str:
+    return parent + "/" + name if parent else name
+
+
+def find_repository_root(directory: str) -> str | None:
+    directory = os.path.abspath(directory)
+    while True:
+        if os.path.exists(os.path.join(directory, ".git")):
+            return directory
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def iter_python_files(
+    directory: str,
+    exclude: Iterable[str] = DEFAULT_EXCLUDES,
+    gitignore: bool = True,
+) -> Iterator[str]:
+    """
+    Recursively yield the Python files of a directory in a stable order.
+
+    The files of a directory come first, sorted by name, then those of its
+    subdirectories in name order. Excluded and ignored directories are not
+    entered at all.
+
+    Parameters
+    ----------
+    directory : str
+        Root directory.
+    exclude : iterable of str, optional (default=DEFAULT_EXCLUDES)
+        Glob patterns matched against the name and the slash separated path
+        relative to `directory` of every file and directory.
+    gitignore : bool, optional (default=True)
+        Whether to skip the paths ignored by the .gitignore files of
+        `directory`, of its subdirectories and of its parents up to the
+        root of the git repository.
+
+    Returns
+    -------
+    iterator of str
+        Paths to the Python source files.
+
+    """
+    excluded = compile_excludes(exclude)
+    rules: list[IgnoreRule] = []
+    # Paths are matched against the rules relative to `top`.
+    prefix = ""
+    if gitignore:
+        top = find_repository_root(directory)
+        if top is not None:
+            prefix = os.path.relpath(os.path.abspath(directory), top)
+            prefix = "" if prefix == "." else prefix.replace(os.sep, "/")
+            parent, base = top, ""
+            for name in prefix.split("/") if prefix else []:
+                rules += read_gitignore(
+                    os.path.join(parent, ".gitignore"), base
+                )
+                parent = os.path.join(parent, name)
+                base = join_relpath(base, name)
+    stack = [(directory, "", rules)]
+    while stack:
+        path, relpath, rules = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        top_relpath = join_relpath(prefix, relpath)
+        if gitignore and any(entry.name == ".gitignore" for entry in entries):
+            rules = rules + read_gitignore(
+                os.path.join(path, ".gitignore"), top_relpath
+            )
+        subdirectories = []
+        for entry in entries:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if not is_dir and not entry.name.endswith(".py"):
+                continue
+            entry_relpath = join_relpath(relpath, entry.name)
+            if excluded is not None and (
+                excluded.match(entry.name) or excluded.match(entry_relpath)
+            ):
+                continue
+            if rules and is_ignored(
+                rules, join_relpath(top_relpath, entry.name), is_dir
+            ):
+                continue
+            if is_dir:
+                subdirectories.append((entry.path, entry_relpath, rules))
+            elif entry.is_file():
+                yield entry.path
+        stack.extend(reversed(subdirectories))
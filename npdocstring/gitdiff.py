@@ -0,0 +1,135 @@
+"""Find the Python files and lines changed in a git repository."""
+import os
+import re
+import subprocess
+
+HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+QUOTED_CHAR_RE = re.compile(rb"\\([0-7]{3}|.)", re.S)
+C_ESCAPES = {
+    b"a": b"\a",
+    b"b": b"\b",
+    b"f": b"\f",
+    b"n": b"\n",
+    b"r": b"\r",
+    b"t": b"\t",
+    b"v": b"\v",
+}
+
+LineRanges = list[tuple[int, int]]
+
+
+def run_git(args: list[str], cwd: str | None = None) -> str:
+    # Paths are printed as is, except for control characters and quotes.
+    return subprocess.run(
+        ["git", "-c", "core.quotePath=false"] + args,
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+
+def unquote_path(path: str) -> str:
+    """
+    Undo the quoting of a path in the headers of a git diff.
+
+    Git appends a tab to paths containing spaces, and writes paths with
+    special characters between double quotes with C-style escapes, such as
+    octal escapes of their UTF-8 bytes.
+
+    Parameters
+    ----------
+    path : str
+        Path as written after "--- " or "+++ ".
+
+    Returns
+    -------
+    str
+        The path, undecodable bytes being kept as surrogate escapes.
+
+    """
+    if path.endswith("\t"):
+        path = path[:-1]
+    if len(path) < 2 or path[0] != '"' or path[-1] != '"':
+        return path
+
+    def unescape(match: re.Match) -> bytes:
+        escape = match.group(1)
+        if len(escape) == 3:
+            return bytes([int(escape, 8)])
+        return C_ESCAPES.get(escape, escape)
+
+    quoted = path[1:-1].encode("utf-8", "surrogateescape")
+    unquoted = QUOTED_CHAR_RE.sub(unescape, quoted)
+    return unquoted.decode("utf-8", "surrogateescape")
+
+
+def parse_unified_diff(diff: str) -> dict[str, LineRanges]:
+    """
+    Extract the changed line ranges of every file from a unified diff.
+
+    Parameters
+    ----------
+    diff : str
+        Output of `git diff --unified=0`.
+
+    Returns
+    -------
+    dict
+        Inclusive ranges of changed line numbers in the new version of each
+        file, by path relative to the repository root. Deleted lines are
+        reported as the line they were deleted after.
+
+    """
+    changes: dict[str, LineRanges] = {}
+    ranges: LineRanges | None = None
+    for line in diff.splitlines():
+        if line.startswith("+++ "):
+            target = unquote_path(line[4:])
+            if target == "/dev/null":
+                ranges = None
+            else:
+                ranges = changes.setdefault(target[2:], [])
+        elif ranges is not None:
+            match = HUNK_RE.match(line)
+            if match is not None:
+                start = int(match.group(1))
+                count = 1 if match.group(2) is None else int(match.group(2))
+                ranges.append((start, start + max(count, 1) - 1))
+    return changes
+
+
+def get_changed_lines(
+    since: str | None = None, staged: bool = False, cwd: str | None = None
+) -> dict[str, LineRanges]:
+    """
+    Ask git for the Python lines changed since a revision or staged.
+
+    Parameters
+    ----------
+    since : str or None, optional (default=None)
+        Revision the working tree is compared to.
+    staged : bool, optional (default=False)
+        Whether to compare the index to `since` (or to HEAD) instead of the
+        working tree.
+    cwd : str or None, optional (default=None)
+        Directory inside the repository.
+
+    Returns
+    -------
+    dict
+        Inclusive ranges of changed line numbers by absolute path.
+
+    """
+    root = run_git(["rev-parse", "--show-toplevel"], cwd).strip()
+    args = ["diff", "--unified=0", "--no-color", "--no-ext-diff"]
+    args += ["--src-prefix=a/", "--dst-prefix=b/", "--diff-filter=AMRC"]
+    if staged:
+        args.append("--cached")
+    if since is not None:
+        args.append(since)
+    args += ["--", "*.py"]
+    changes = parse_unified_diff(run_git(args, root))
+    return {
+        os.path.join(root, path): ranges for path, ranges in changes.items()
+    }
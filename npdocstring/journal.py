@@ -0,0 +1,106 @@
+"""Append-only record of the files a batch run is done with."""
+import json
+import os
+from collections.abc import Iterable, Iterator
+
+from .batch import FileResult
+
+DONE_STATUSES = {"processed", "unchanged", "cached"}
+
+
+def stat_signature(path: str) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class Journal:
+    """
+    Journal of the files successfully processed by interrupted runs.
+
+    Each processed file is appended as a JSON line holding its path, status,
+    modification time and size, and flushed right away. A file is done if it
+    was recorded with a successful status and has not changed since, so a
+    run can resume where a previous one stopped. Failed files are retried.
+
+    Parameters
+    ----------
+    path : str
+        Path to the journal, created if needed.
+
+    Attributes
+    ----------
+    done : dict
+        Modification time and size of the done files, by path.
+    skipped : int
+        Number of paths skipped because they were done.
+
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.done: dict[str, tuple[int, int]] = {}
+        self.skipped = 0
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        signature = (entry["mtime_ns"], entry["size"])
+                        done = entry["status"] in DONE_STATUSES
+                    except (ValueError, KeyError, TypeError):
+                        # Likely the last line of an interrupted run.
+                        continue
+                    if done:
+                        self.done[entry["path"]] = signature
+                    else:
+                        self.done.pop(entry["path"], None)
+        self.file = open(path, "a")
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __contains__(self, path: str) -> bool:
+        signature = self.done.get(path)
+        return signature is not None and stat_signature(path) == signature
+
+    def filter(self, paths: Iterable[str]) -> Iterator[str]:
+        """Yield the paths that are not done, counting the others."""
+        for path in paths:
+            if path in self:
+                self.skipped += 1
+            else:
+                yield path
+
+    def record(self, result: FileResult) -> None:
+        """
+        Append the outcome of processing a file.
+
+        The file must be written already, since it is recorded with its
+        current modification time and size.
+
+        Parameters
+        ----------
+        result : FileResult
+            The result of the file.
+
+        """
+        signature = stat_signature(result.path)
+        if signature is None:
+            return
+        entry = {
+            "path": result.path,
+            "status": result.status,
+            "mtime_ns": signature[0],
+            "size": signature[1],
+        }
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
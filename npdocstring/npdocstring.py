@@ -1,133 +1,438 @@
 #!/usr/bin/env python3
 import ast
+import bisect
+import functools
+import re
+import warnings
+from array import array
 from ast import AsyncFunctionDef, ClassDef, FunctionDef
 from collections import namedtuple
+from collections.abc import Callable, Iterator, Sequence
+
+from .stats import Stats, timed
 
 AtrOrArg = namedtuple("AtrOrArg", ["name", "hint", "default"])
+Edit = namedtuple("Edit", ["offset", "text"])
+FuncClassRecord = namedtuple(
+    "FuncClassRecord",
+    [
+        "qualname",
+        "kind",
+        "lineno",
+        "insert_lineno",
+        "col_offset",
+        "arguments",
+        "returns",
+        "attributes",
+        "has_docstring",
+    ],
+)
+ParsedFile = namedtuple("ParsedFile", ["line_index", "records", "tree"])
+# Names are their own token, other tokens are tuples of a kind and the
+# number of children, followed by what their renderer reads.
+HintToken = str | tuple
+HintKey = tuple[HintToken, ...]
+HintRenderer = Callable[[tuple, list[str]], str]
+
+# Module state is limited to compiled patterns, read-only tables and the
+# thread-safe cache of rendered hints, and everything else is local to a
+# call, so that files can be processed concurrently on threads.
+HINT_CACHE_SIZE = 4096
+# Generic aliases by their name in lowercase.
+SEQUENCE_GENERICS = {
+    "collection",
+    "counter",
+    "deque",
+    "frozenset",
+    "iterable",
+    "iterator",
+    "list",
+    "sequence",
+    "set",
+    "type",
+}
+MAPPING_GENERICS = {
+    "defaultdict",
+    "dict",
+    "mapping",
+    "mutablemapping",
+    "ordereddict",
+}
+WRAPPER_GENERICS = {
+    "annotated",
+    "classvar",
+    "final",
+    "notrequired",
+    "readonly",
+    "required",
+}
+OPAQUE_GENERICS = {"callable", "literal"}
+OR_TOKEN = ("or", 2)
+
+NEWLINE_RE = re.compile(r"\r\n?|\n")
+
+DEF_RE = re.compile(r"^([ \t]*)(?:async[ \t]+)?(?:def|class)[ \t]+(\w+)", re.M)
+HEADER_TOKEN_RE = re.compile(
+    r"""[rRbBuUfF]*('''|\"\"\"|'|")|[(\[{]|[)\]}]|:|#|\\\r?\n|\r\n?|\n"""
+)
+STRING_BODY_RES = {
+    "'''": r"(?:[^'\\]|\\.|'(?!''))*'''",
+    '"""': r'(?:[^"\\]|\\.|"(?!""))*"""',
+    "'": r"(?:[^'\\\r\n]|\\.)*'",
+    '"': r'(?:[^"\\\r\n]|\\.)*"',
+}
+STRING_END_RES = {
+    quote: re.compile(body, re.S) for quote, body in STRING_BODY_RES.items()
+}
+COMMENT_RE = re.compile(r"[^\r\n]*")
+DOCSTRING_RE = re.compile(
+    r"(?:[ \t]*(?:#[^\r\n]*)?(?:\r\n?|\n))*[ \t]*[rRuU]?(?:"
+    + "|".join(quote + body for quote, body in STRING_BODY_RES.items())
+    + r")[ \t]*(?:#[^\r\n]*)?(?:\r\n?|\n|\Z)",
+    re.S,
+)
+
+
+class LineIndex:
+    """
+    Start offsets of every line of a file.
+
+    The index is built in a single pass and is meant to be shared by every
+    stage processing the file. Lines are split like the Python tokenizer
+    does, so that they match AST line numbers.
+
+    Parameters
+    ----------
+    text : str
+        Content of the file.
+
+    Attributes
+    ----------
+    text : str
+        Content of the file.
+    offsets : array of int
+        Start offset of each line, followed by the length of the text.
+
+    """
+
+    __slots__ = ("text", "offsets")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.offsets = array("l", [0])
+        self.offsets.extend(m.end() for m in NEWLINE_RE.finditer(text))
+        if self.offsets[-1] != len(text):
+            self.offsets.append(len(text))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def line(self, i: int) -> str:
+        return self.text[self.offsets[i] : self.offsets[i + 1]]
+
+    def slice(self, start: int, stop: int) -> str:
+        return self.text[self.offsets[start] : self.offsets[stop]]
+
+    def lineno(self, offset: int) -> int:
+        return bisect.bisect_right(self.offsets, offset, hi=len(self))
+
+
+def iter_nested_statements(node: ast.AST) -> Iterator[ast.stmt]:
+    for field in ("body", "orelse", "finalbody"):
+        yield from getattr(node, field, ())
+    for handler in getattr(node, "handlers", ()):
+        yield from handler.body
+    for case in getattr(node, "cases", ()):
+        yield from case.body
+
+
+def get_insertion_point(
+    node: FunctionDef | AsyncFunctionDef | ClassDef,
+) -> tuple[int, int]:
+    first_statement = node.body[0]
+    lineno = first_statement.lineno
+    if isinstance(first_statement, (FunctionDef, AsyncFunctionDef, ClassDef)):
+        for decorator in first_statement.decorator_list:
+            lineno = min(lineno, decorator.lineno)
+    return lineno, first_statement.col_offset
 
 
-def measure_indentation(file_content: str) -> list[int]:
-    lines = file_content.splitlines()
-    indentation = [0 for i in range(len(lines))]
-    for i, line in enumerate(lines):
-        if len(line) == 0:
-            indentation[i] = 0
+def make_funclassdef_record(
+    node: FunctionDef | AsyncFunctionDef | ClassDef,
+    qualname: str,
+    kind: str,
+    constructor: FunctionDef | None,
+    describe: bool = True,
+) -> FuncClassRecord:
+    position = (node.lineno, *get_insertion_point(node))
+    if ast.get_docstring(node) is not None:
+        return FuncClassRecord(
+            qualname, kind, *position, None, None, None, True
+        )
+    if not describe:
+        return FuncClassRecord(
+            qualname, kind, *position, None, None, None, False
+        )
+    if isinstance(node, ClassDef):
+        arguments = None
+        attributes = []
+        if constructor is not None:
+            arguments = get_function_arguments(constructor)
+            arg_names = {arg.name for arg in arguments}
+            attributes = [
+                attr
+                for attr in get_class_attributes(constructor)
+                if attr.name not in arg_names
+            ]
+        return FuncClassRecord(
+            qualname, kind, *position, arguments, None, attributes, False
+        )
+    arguments = get_function_arguments(node)
+    returns = parse_return_hint(node)
+    return FuncClassRecord(
+        qualname, kind, *position, arguments, returns, None, False
+    )
+
+
+def iter_child_funclassdefs(
+    node: ast.AST,
+) -> Iterator[FunctionDef | AsyncFunctionDef | ClassDef]:
+    # Functions and classes defined in the body of a node, including those
+    # nested in compound statements such as if, try or with.
+    stack = list(iter_nested_statements(node))[::-1]
+    while stack:
+        child = stack.pop()
+        if isinstance(child, (FunctionDef, AsyncFunctionDef, ClassDef)):
+            yield child
         else:
-            j = 0
-            while j < len(line) and line[j] == " ":
-                j += 1
-            indentation[i] = j
-    return indentation
-
-
-def get_funclassdef_nodes(file_content) -> list[ast.AST]:
-    root = ast.parse(file_content)
-    fcnodes: list[ast.AST] = []
-    for node in ast.iter_child_nodes(root):
-        if isinstance(node, (FunctionDef, AsyncFunctionDef, ClassDef)):
-            if (
-                node.name.startswith("__") and node.name.endswith("__")
-            ) or node.name.startswith("test_"):
-                continue
-            if ast.get_docstring(node) is None:
-                fcnodes.append(node)
-            if isinstance(node, ClassDef):
-                for sub_node in ast.iter_child_nodes(node):
-                    if isinstance(sub_node, (FunctionDef, AsyncFunctionDef)):
-                        if sub_node.name.startswith(
-                            "__"
-                        ) and sub_node.name.endswith("__"):
-                            continue
-                        if ast.get_docstring(sub_node) is None:
-                            fcnodes.append(sub_node)
-    return fcnodes
-
-
-def get_subscript(node: ast.Subscript) -> str:
-    if isinstance(node.value, ast.Name):
-        return node.value.id
-    elif isinstance(node.value, ast.Attribute):
-        return node.value.attr
-    return "FIXME"
-
-
-def parse_subscript_elt_hint(node: ast.AST, i: int) -> str:
-    assert hasattr(node, "slice")
-    assert hasattr(node.slice, "elts")
-    elt_hint = parse_hint(node.slice.elts[i])
-    if elt_hint is None:
-        raise RuntimeError(
-            "Could not parse subscript element. Subscript was: {}. Element was: {}".format(
-                ast.dump(node),
-                ast.dump(node.slice.elts[i]),
+            stack.extend(list(iter_nested_statements(child))[::-1])
+
+
+def iter_funclassdefs(
+    root: ast.Module,
+) -> Iterator[tuple[FunctionDef | AsyncFunctionDef | ClassDef, str, str]]:
+    stack: list[tuple[ast.stmt, str, ast.AST]] = [
+        (node, "", root) for node in reversed(root.body)
+    ]
+    while stack:
+        node, prefix, parent = stack.pop()
+        if not isinstance(node, (FunctionDef, AsyncFunctionDef, ClassDef)):
+            stack.extend(
+                (child, prefix, parent)
+                for child in reversed(list(iter_nested_statements(node)))
             )
+            continue
+        if node.name.startswith("__") and node.name.endswith("__"):
+            continue
+        if not prefix and node.name.startswith("test_"):
+            continue
+        qualname = prefix + node.name
+        if isinstance(node, ClassDef):
+            kind = "class"
+        elif isinstance(parent, ClassDef):
+            kind = "method"
+        else:
+            kind = "function"
+        yield node, qualname, kind
+        stack.extend(
+            (child, qualname + ".", node)
+            for child in reversed(list(iter_nested_statements(node)))
         )
-    return elt_hint
+
+
+def collect_funclassdefs(
+    root: ast.Module,
+    describe: bool = True,
+    line_ranges: list[tuple[int, int]] | None = None,
+) -> list[FuncClassRecord]:
+    records = []
+    for node, qualname, kind in iter_funclassdefs(root):
+        if line_ranges is not None and not touches_line_ranges(
+            node, line_ranges
+        ):
+            continue
+        constructor = None
+        if isinstance(node, ClassDef):
+            constructor = get_class_constructor(node)
+        records.append(
+            make_funclassdef_record(
+                node, qualname, kind, constructor, describe
+            )
+        )
+    return records
+
+
+def get_funclassdef_nodes(file_content: str | ast.Module) -> list[ast.AST]:
+    if isinstance(file_content, ast.Module):
+        root = file_content
+    else:
+        root = ast.parse(file_content)
+    return [
+        node
+        for node, _, _ in iter_funclassdefs(root)
+        if ast.get_docstring(node) is None
+    ]
+
+
+def get_dotted_name(node: ast.AST) -> str | None:
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def get_generic_name(name: str) -> str:
+    return name.rpartition(".")[2].lower()
+
+
+# Key builders append the token of a node and return its children in
+# reverse order.
+def add_attribute_token(node: ast.Attribute, tokens: list[HintToken]) -> tuple:
+    name = get_dotted_name(node)
+    if name is None:
+        raise Exception("parse_hint: {}".format(ast.dump(node)))
+    tokens.append(name)
+    return ()
+
+
+def add_constant_token(node: ast.Constant, tokens: list[HintToken]) -> tuple:
+    # The type tells apart equal values such as True and 1.
+    tokens.append(("constant", 0, type(node.value), node.value))
+    return ()
+
+
+def add_binop_token(node: ast.BinOp, tokens: list[HintToken]) -> tuple:
+    if not isinstance(node.op, ast.BitOr):
+        raise Exception("parse_hint: {}".format(ast.dump(node)))
+    tokens.append(OR_TOKEN)
+    return node.right, node.left
+
+
+def add_subscript_token(node: ast.Subscript, tokens: list[HintToken]) -> list:
+    name = get_dotted_name(node.value)
+    generic = None if name is None else get_generic_name(name)
+    if isinstance(node.slice, ast.Tuple):
+        elts = node.slice.elts
+    else:
+        elts = [node.slice]
+    literals = None
+    if generic in OPAQUE_GENERICS:
+        if generic == "literal":
+            literals = tuple(map(ast.unparse, elts))
+        elts = []
+    elif generic in WRAPPER_GENERICS:
+        # Metadata may be any expression.
+        elts = elts[:1]
+    tokens.append(("generic", len(elts), name, literals))
+    return elts[::-1]
+
+
+def get_hint_key(node: ast.AST) -> HintKey:
+    # The key lists the tokens of the hint in prefix order, without their
+    # positions, so that the same annotation written in different places
+    # shares a key. It is built without recursion or string formatting.
+    tokens: list[HintToken] = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if type(node) is ast.Name:
+            tokens.append(node.id)
+            continue
+        add_token = HINT_KEY_BUILDERS.get(type(node))
+        if add_token is None:
+            raise Exception("parse_hint: {}".format(ast.dump(node)))
+        stack.extend(add_token(node, tokens))
+    return tuple(tokens)
+
+
+def render_sequence_hint(token: tuple, hints: list[str]) -> str:
+    generic = get_generic_name(token[2])
+    if not hints:
+        return generic
+    return "{} of {}".format(generic, ", ".join(hints))
+
+
+def render_mapping_hint(token: tuple, hints: list[str]) -> str:
+    generic = get_generic_name(token[2])
+    if len(hints) != 2:
+        return generic
+    return "{} of {} to {}".format(generic, *hints)
+
+
+def render_tuple_hint(token: tuple, hints: list[str]) -> str:
+    if len(hints) == 0:
+        return "tuple"
+    elif len(hints) == 1 or (len(hints) == 2 and hints[1] == "..."):
+        return "tuple of " + hints[0]
+    return "({})".format(", ".join(hints))
+
+
+def render_generic_hint(token: tuple, hints: list[str]) -> str:
+    name = token[2]
+    if name is None:
+        return "FIXME"
+    renderer = GENERIC_HINT_RENDERERS.get(get_generic_name(name))
+    if renderer is None:
+        # User-defined generics are described by their own name.
+        return name
+    return renderer(token, hints)
+
+
+@functools.lru_cache(maxsize=HINT_CACHE_SIZE)
+def render_hint_key(key: HintKey) -> str:
+    # Tokens are rendered from the last, so that the hints of the children
+    # of a token are on top of the stack, the first child last.
+    hints: list[str] = []
+    for token in reversed(key):
+        if isinstance(token, str):
+            hints.append(token)
+            continue
+        n_children = token[1]
+        children = hints[: -n_children - 1 : -1]
+        if n_children:
+            del hints[-n_children:]
+        hints.append(HINT_RENDERERS[token[0]](token, children))
+    return hints[0]
 
 
 def parse_hint(node: ast.AST | None) -> str | None:
     if node is None:
         return None
     elif isinstance(node, ast.Name):
+        # Most hints are plain names, which are cheaper to render than to
+        # look up.
         return node.id
-    elif isinstance(node, ast.Subscript):
-        if hasattr(node, "slice"):
-            if get_subscript(node) == "Union" and hasattr(node.slice, "elts"):
-                elt_hints = [
-                    parse_subscript_elt_hint(node, i)
-                    for i in range(len(node.slice.elts))
-                ]
-                return " or ".join(elt_hints)
-            elif get_subscript(node).lower() in {"list", "iterable"}:
-                lowered = get_subscript(node).lower()
-                if node.slice is None:
-                    return lowered
-                return "{} of {}".format(lowered, parse_hint(node.slice))
-            elif get_subscript(node) == "Tuple":
-                if isinstance(node.slice, ast.Tuple):
-                    if (
-                        not hasattr(node.slice, "elts")
-                        or len(node.slice.elts) == 0
-                    ):
-                        return "tuple"
-                    elif (
-                        hasattr(node.slice, "elts")
-                        and len(node.slice.elts) == 1
-                    ):
-                        elt_hint = parse_subscript_elt_hint(node, 0)
-                        return "tuple of " + elt_hint
-                    elif hasattr(node.slice, "elts"):
-                        elt_hints = [
-                            parse_subscript_elt_hint(node, i)
-                            for i in range(len(node.slice.elts))
-                        ]
-                        return "({})".format(", ".join(elt_hints))
-                return "FIXME"
-            else:
-                return "FIXME"
-        else:
-            return "FIXME"
-    elif isinstance(node, ast.Attribute):
-        toconcat = list()
-        n: ast.Attribute | ast.Name = node
-        while not isinstance(n, ast.Name):
-            assert isinstance(n, ast.Attribute)
-            toconcat.append(n.attr)
-            assert isinstance(n.value, (ast.Attribute, ast.Name))
-            n = n.value
-        assert isinstance(n, ast.Name)
-        toconcat.append(n.id)
-        return ".".join(reversed(toconcat))
-    elif isinstance(node, (ast.Constant, ast.NameConstant)):
-        return str(node.value)
-    elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
-        left_hint = parse_hint(node.left)
-        right_hint = parse_hint(node.right)
-        assert isinstance(left_hint, str)
-        assert isinstance(right_hint, str)
-        return left_hint + " or " + right_hint
-    else:
-        raise Exception("parse_hint: {}".format(ast.dump(node)))
+    return render_hint_key(get_hint_key(node))
+
+
+# Each builder takes the node type it is registered for.
+HINT_KEY_BUILDERS: dict[type, Callable[..., Sequence[ast.AST]]] = {
+    ast.Attribute: add_attribute_token,
+    ast.Constant: add_constant_token,
+    ast.BinOp: add_binop_token,
+    ast.Subscript: add_subscript_token,
+}
+HINT_RENDERERS: dict[str, HintRenderer] = {
+    "constant": lambda token, hints: (
+        "..." if token[3] is ... else str(token[3])
+    ),
+    "or": lambda token, hints: " or ".join(hints),
+    "generic": render_generic_hint,
+}
+GENERIC_HINT_RENDERERS: dict[str, HintRenderer] = {
+    "union": lambda token, hints: " or ".join(hints),
+    "optional": lambda token, hints: " or ".join(hints + ["None"]),
+    "tuple": render_tuple_hint,
+    "callable": lambda token, hints: "callable",
+    "literal": lambda token, hints: "{{{}}}".format(", ".join(token[3])),
+    **dict.fromkeys(SEQUENCE_GENERICS, render_sequence_hint),
+    **dict.fromkeys(MAPPING_GENERICS, render_mapping_hint),
+    **dict.fromkeys(WRAPPER_GENERICS, lambda token, hints: hints[0]),
+}
 
 
 def parse_return_hint(node: FunctionDef | AsyncFunctionDef) -> str | None:
@@ -179,19 +484,19 @@ def get_function_arguments(
 
 
 def make_atrorarg_string(args: list[AtrOrArg], section_name: str) -> str:
-    string = ""
+    parts = []
     if len(args) > 0:
-        string += "{}\n{}\n".format(section_name, "-" * len(section_name))
+        parts.append("{}\n{}\n".format(section_name, "-" * len(section_name)))
         for arg in args:
-            string += arg.name
+            parts.append(arg.name)
             if arg.hint is not None:
-                string += " : {}".format(arg.hint)
+                parts.append(" : {}".format(arg.hint))
                 if arg.default is not None:
-                    string += ", optional (default={})".format(arg.default)
+                    parts.append(", optional (default={})".format(arg.default))
             else:
-                string += " : FIXME"
-            string += "\n    FIXME\n\n"
-    return string
+                parts.append(" : FIXME")
+            parts.append("\n    FIXME\n\n")
+    return "".join(parts)
 
 
 def make_parameters_string(args: list[AtrOrArg]) -> str:
@@ -202,19 +507,27 @@ def make_attributes_string(args: list[AtrOrArg]) -> str:
     return make_atrorarg_string(args, "Attributes")
 
 
-def generate_function_docstring(node: FunctionDef | AsyncFunctionDef) -> str:
-    docstring = '"""\nFIXME'
-    arguments = get_function_arguments(node)
+def make_function_docstring(
+    arguments: list[AtrOrArg], returns: str | None
+) -> str:
+    parts = ['"""\nFIXME']
     if len(arguments):
-        docstring += "\n\n"
-        docstring += make_parameters_string(arguments)
-    returns = parse_return_hint(node)
+        parts.append("\n\n")
+        parts.append(make_parameters_string(arguments))
     if returns is not None:
-        docstring += "Returns\n-------\n"
-        docstring += returns + "\n"
-        docstring += "    FIXME\n\n"
-    docstring += '"""\n'
-    return docstring
+        if not len(arguments):
+            parts.append("\n\n")
+        parts.append("Returns\n-------\n")
+        parts.append(returns + "\n")
+        parts.append("    FIXME\n\n")
+    parts.append('"""\n')
+    return "".join(parts)
+
+
+def generate_function_docstring(node: FunctionDef | AsyncFunctionDef) -> str:
+    return make_function_docstring(
+        get_function_arguments(node), parse_return_hint(node)
+    )
 
 
 def get_class_constructor(cnode: ClassDef) -> FunctionDef | None:
@@ -238,22 +551,37 @@ def get_class_attributes(constructor: FunctionDef) -> list[AtrOrArg]:
     return attributes
 
 
+def make_class_docstring(
+    arguments: list[AtrOrArg] | None, attributes: list[AtrOrArg]
+) -> str:
+    parts = ['"""\nFIXME']
+    if arguments is not None:
+        if len(arguments) > 0 or len(attributes) > 0:
+            parts.append("\n\n")
+            parts.append(make_parameters_string(arguments))
+            parts.append(make_attributes_string(attributes))
+    parts.append('"""\n')
+    return "".join(parts)
+
+
 def generate_class_docstring(cnode: ClassDef) -> str:
-    docstring = '"""\nFIXME'
     constructor = get_class_constructor(cnode)
-    if constructor is not None:
-        arguments = get_function_arguments(constructor)
-        arg_names = [arg.name for arg in arguments]
-        attributes = get_class_attributes(constructor)
-        attributes = [
-            attr for attr in attributes if attr.name not in arg_names
-        ]
-        if len(arguments) > 0 or len(attributes) > 0:
-            docstring += "\n\n"
-            docstring += make_parameters_string(arguments)
-            docstring += make_attributes_string(attributes)
-    docstring += '"""\n'
-    return docstring
+    return generate_record_docstring(
+        make_funclassdef_record(cnode, cnode.name, "class", constructor)
+    )
+
+
+def generate_record_docstring(record: FuncClassRecord) -> str:
+    if record.kind == "class":
+        return make_class_docstring(record.arguments, record.attributes)
+    return make_function_docstring(record.arguments, record.returns)
+
+
+def generate_docstring(node: ast.AST) -> str:
+    if isinstance(node, ClassDef):
+        return generate_class_docstring(node)
+    assert isinstance(node, (FunctionDef, AsyncFunctionDef))
+    return generate_function_docstring(node)
 
 
 def pad_docstring(docstring: str, pad: str) -> str:
@@ -264,54 +592,267 @@ def pad_docstring(docstring: str, pad: str) -> str:
     return "".join(lines)
 
 
-def get_fcnode_last_lineno(
-    node: FunctionDef | AsyncFunctionDef | ClassDef,
-    indentation: list[int],
-    indentation_spaces: int,
-) -> int:
-    lineno = node.body[0].lineno - 1
-    while (
-        indentation[lineno] == node.lineno + indentation_spaces
-        or indentation[lineno] == 0
-    ):
-        lineno -= 1
-    return lineno
+def iter_spliced_chunks(text: str, edits: list[Edit]) -> Iterator[str]:
+    position = 0
+    for edit in sorted(edits, key=lambda edit: edit.offset):
+        yield text[position : edit.offset]
+        yield edit.text
+        position = edit.offset
+    yield text[position:]
+
+
+def apply_edits(text: str, edits: list[Edit]) -> str:
+    return "".join(iter_spliced_chunks(text, edits))
+
+
+def get_docstring_edit(
+    docstring: str, line_index: LineIndex, lineno: int, col_offset: int
+) -> Edit | None:
+    offset = line_index.offsets[lineno - 1]
+    pad = line_index.text[offset : offset + col_offset]
+    if pad.strip(" \t\f"):
+        # The body starts on the line of the signature.
+        return None
+    return Edit(offset, pad_docstring(docstring, pad))
+
+
+def get_docstring_edits(
+    docstrings: list[str],
+    line_index: LineIndex,
+    fcnodes: list[ast.AST],
+) -> list[Edit]:
+    edits = []
+    for node, docstring in zip(fcnodes, docstrings):
+        assert isinstance(node, (FunctionDef, AsyncFunctionDef, ClassDef))
+        edit = get_docstring_edit(
+            docstring, line_index, *get_insertion_point(node)
+        )
+        if edit is not None:
+            edits.append(edit)
+    return edits
 
 
 def integrate_docstrings(
     docstrings: list[str],
-    file_content: str,
-    indentation: list[int],
+    line_index: LineIndex,
     fcnodes: list[ast.AST],
-    indentation_spaces: int,
 ) -> str:
-    processed = ""
-    lines = file_content.splitlines(keepends=True)
-    splits = []
-    for node in fcnodes:
-        assert isinstance(node, (FunctionDef, AsyncFunctionDef, ClassDef))
-        splits.append(
-            get_fcnode_last_lineno(node, indentation, indentation_spaces)
+    edits = get_docstring_edits(docstrings, line_index, fcnodes)
+    return apply_edits(line_index.text, edits)
+
+
+def get_node_spans(
+    node: FunctionDef | AsyncFunctionDef | ClassDef,
+) -> list[tuple[int, int]]:
+    first_lineno = min(
+        [node.lineno] + [decorator.lineno for decorator in node.decorator_list]
+    )
+    assert node.end_lineno is not None
+    if not isinstance(node, ClassDef):
+        return [(first_lineno, node.end_lineno)]
+    spans = [(first_lineno, node.body[0].lineno - 1)]
+    constructor = get_class_constructor(node)
+    if constructor is not None:
+        spans.extend(get_node_spans(constructor))
+    return spans
+
+
+def touches_line_ranges(
+    node: FunctionDef | AsyncFunctionDef | ClassDef,
+    line_ranges: list[tuple[int, int]],
+) -> bool:
+    for first, last in get_node_spans(node):
+        for start, end in line_ranges:
+            if start <= last and first <= end:
+                return True
+    return False
+
+
+def find_header_end(file_content: str, position: int) -> int | None:
+    depth = 0
+    while True:
+        match = HEADER_TOKEN_RE.search(file_content, position)
+        if match is None:
+            return None
+        token, position = match.group(), match.end()
+        quote = match.group(1)
+        if quote is not None:
+            end = STRING_END_RES[quote].match(file_content, position)
+            if end is None:
+                return None
+            position = end.end()
+        elif token in "([{":
+            depth += 1
+        elif token in ")]}":
+            depth -= 1
+        elif token == ":" and depth == 0:
+            return position
+        elif token == "#":
+            comment = COMMENT_RE.match(file_content, position)
+            assert comment is not None
+            position = comment.end()
+        elif token[0] != "\\" and depth == 0:
+            return None
+
+
+def may_lack_docstrings(file_content: str) -> bool:
+    for match in DEF_RE.finditer(file_content):
+        indentation, name = match.groups()
+        if name.startswith("__") and name.endswith("__"):
+            continue
+        if not indentation and name.startswith("test_"):
+            continue
+        header_end = find_header_end(file_content, match.end())
+        if header_end is None:
+            return True
+        if DOCSTRING_RE.match(file_content, header_end) is None:
+            return True
+    return False
+
+
+def parse_file(
+    file_content: str,
+    stats: Stats | None = None,
+    line_ranges: list[tuple[int, int]] | None = None,
+    keep_tree: bool = True,
+    describe: bool = True,
+) -> ParsedFile:
+    with timed(stats, "index"):
+        line_index = LineIndex(file_content)
+    with timed(stats, "discover"):
+        tree = ast.parse(file_content)
+        records = [
+            record
+            for record in collect_funclassdefs(
+                tree, describe=describe, line_ranges=line_ranges
+            )
+            if not record.has_docstring
+        ]
+    if stats is not None:
+        stats.counters["lines"] += len(line_index)
+        stats.counters["docstrings"] += len(records)
+    return ParsedFile(line_index, records, tree if keep_tree else None)
+
+
+def get_parsed_file_edits(
+    parsed: ParsedFile, stats: Stats | None = None
+) -> list[Edit]:
+    line_index, records, _ = parsed
+    with timed(stats, "render"):
+        docstrings = [generate_record_docstring(record) for record in records]
+    with timed(stats, "splice"):
+        edits = []
+        for record, docstring in zip(records, docstrings):
+            edit = get_docstring_edit(
+                docstring, line_index, record.insert_lineno, record.col_offset
+            )
+            if edit is not None:
+                edits.append(edit)
+        return edits
+
+
+def process_parsed_file(
+    parsed: ParsedFile, *, stats: Stats | None = None
+) -> str:
+    line_index = parsed.line_index
+    if len(parsed.records) == 0:
+        return line_index.text
+    edits = get_parsed_file_edits(parsed, stats)
+    with timed(stats, "splice"):
+        return apply_edits(line_index.text, edits)
+
+
+def get_file_edits(
+    file_content: str,
+    *,
+    stats: Stats | None = None,
+    line_ranges: list[tuple[int, int]] | None = None,
+    prescan: bool = True,
+) -> list[Edit]:
+    if prescan:
+        with timed(stats, "prescan"):
+            lacking = may_lack_docstrings(file_content)
+        if not lacking:
+            if stats is not None:
+                stats.counters["prescan_skipped"] += 1
+            return []
+    # The tree is released as soon as the records are collected.
+    parsed = parse_file(file_content, stats, line_ranges, keep_tree=False)
+    return get_parsed_file_edits(parsed, stats)
+
+
+def process_file(
+    file_content: str,
+    indentation_spaces: int | None = None,
+    *,
+    stats: Stats | None = None,
+    line_ranges: list[tuple[int, int]] | None = None,
+    prescan: bool = True,
+):
+    if indentation_spaces is not None:
+        warnings.warn(
+            "indentation_spaces is deprecated and ignored, docstrings are "
+            "indented like the body they are inserted in",
+            DeprecationWarning,
+            stacklevel=2,
         )
-    for i, split in enumerate(splits):
-        start_line = 0 if i < 1 else splits[i - 1]
-        processed += "".join(lines[start_line:split])
-        pad = " " * (indentation[fcnodes[i].lineno - 1] + indentation_spaces)
-        processed += pad_docstring(docstrings[i], pad)
-    processed += "".join(lines[splits[-1] :])
-    return processed
-
-
-def process_file(file_content: str, indentation_spaces: int = 4):
-    indentation = measure_indentation(file_content)
-    fcnodes = get_funclassdef_nodes(file_content)
-    docstrings = []
-    for node in fcnodes:
-        if isinstance(node, (FunctionDef, AsyncFunctionDef)):
-            docstrings.append(generate_function_docstring(node))
-        elif isinstance(node, ClassDef):
-            docstrings.append(generate_class_docstring(node))
-    new_file_content = integrate_docstrings(
-        docstrings, file_content, indentation, fcnodes, indentation_spaces
+    edits = get_file_edits(
+        file_content, stats=stats, line_ranges=line_ranges, prescan=prescan
+    )
+    if len(edits) == 0:
+        return file_content
+    with timed(stats, "splice"):
+        return apply_edits(file_content, edits)
+
+
+def contains_lineno(
+    node: FunctionDef | AsyncFunctionDef | ClassDef, lineno: int
+) -> bool:
+    first_lineno = min(
+        [node.lineno] + [decorator.lineno for decorator in node.decorator_list]
+    )
+    assert node.end_lineno is not None
+    return first_lineno <= lineno <= node.end_lineno
+
+
+def find_node(
+    tree: ast.Module,
+    lineno: int | None = None,
+    qualname: str | None = None,
+) -> FunctionDef | AsyncFunctionDef | ClassDef | None:
+    names = qualname.split(".") if qualname is not None else []
+    found = None
+    parent: ast.AST = tree
+    while lineno is not None or len(names) > 0:
+        for node in iter_child_funclassdefs(parent):
+            if lineno is not None and contains_lineno(node, lineno):
+                break
+            if lineno is None and node.name == names[0]:
+                names.pop(0)
+                break
+        else:
+            return found if lineno is not None else None
+        found = parent = node
+    return found
+
+
+def process_node(
+    file_content: str | ParsedFile,
+    *,
+    lineno: int | None = None,
+    qualname: str | None = None,
+) -> Edit | None:
+    if (lineno is None) == (qualname is None):
+        raise ValueError("exactly one of lineno and qualname must be given")
+    if isinstance(file_content, ParsedFile):
+        line_index, tree = file_content.line_index, file_content.tree
+        if tree is None:
+            tree = ast.parse(line_index.text)
+    else:
+        line_index, tree = LineIndex(file_content), ast.parse(file_content)
+    node = find_node(tree, lineno, qualname)
+    if node is None or ast.get_docstring(node) is not None:
+        return None
+    return get_docstring_edit(
+        generate_docstring(node), line_index, *get_insertion_point(node)
     )
-    return new_file_content
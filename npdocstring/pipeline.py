@@ -0,0 +1,311 @@
+"""
+Overlap file reads and writes with processing, for slow filesystems.
+
+Files are read ahead by a pool of threads and results are written by a
+background thread, while the main process (or a pool of worker processes)
+generates docstrings. Every stage is bounded, so that a slow stage blocks
+the others instead of buffering the whole tree in memory.
+"""
+import functools
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+from .batch import (
+    FileResult,
+    describe_error,
+    lazy_map,
+    process_content,
+    time_limit,
+    write_file_atomically,
+)
+from .cache import ResultCache
+from .gitdiff import LineRanges
+from .stats import Stats, timed
+
+DEFAULT_IO_THREADS = 8
+DEFAULT_QUEUE_DEPTH = 64
+
+
+def read_file(path: str) -> tuple[bytes | None, str | None]:
+    try:
+        with open(path, "rb") as f:
+            return f.read(), None
+    except OSError as e:
+        return None, describe_error(e)
+
+
+def prefetch(
+    paths: Iterable[str], threads: int, depth: int
+) -> Iterator[tuple[str, bytes | None, str | None]]:
+    """
+    Read files ahead of their consumption on a pool of threads.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Paths to the files, consumed lazily.
+    threads : int
+        Number of reading threads.
+    depth : int
+        Maximum number of files read ahead.
+
+    Returns
+    -------
+    iterator of tuple
+        The path, raw content and None of each file, in input order, or
+        the path, None and the error of files that could not be read.
+
+    """
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending: deque = deque()
+        try:
+            for path in paths:
+                pending.append((path, executor.submit(read_file, path)))
+                if len(pending) >= depth:
+                    path, future = pending.popleft()
+                    yield (path, *future.result())
+            while pending:
+                path, future = pending.popleft()
+                yield (path, *future.result())
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+class BackgroundWriter:
+    """
+    Thread writing files in the order they are submitted.
+
+    Every submitted result comes back from `iter_completed` once the file
+    is written, in submission order, so that a file is only reported done
+    when it is on disk.
+
+    Parameters
+    ----------
+    depth : int
+        Maximum number of pending writes, beyond which `submit` blocks.
+    stats : Stats or None, optional (default=None)
+        Stats where the time spent writing and the bytes written are added
+        once closed.
+
+    """
+
+    def __init__(self, depth: int, stats: Stats | None = None) -> None:
+        self.queue: queue.Queue = queue.Queue(maxsize=depth)
+        self.completed: queue.SimpleQueue = queue.SimpleQueue()
+        self.stats = stats
+        self.write_stats = Stats() if stats is not None else None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def __enter__(self) -> "BackgroundWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            result, content, original = item
+            if content is not None:
+                path = result.path
+                try:
+                    with timed(self.write_stats, "write"):
+                        if original is not None:
+                            with open(path + "--", "wb") as f:
+                                f.write(original)
+                        write_file_atomically(path, content)
+                except Exception as e:
+                    error = describe_error(e)
+                    result = FileResult(path, "failed", None, error=error)
+                else:
+                    if self.write_stats is not None:
+                        self.write_stats.counters["bytes_written"] += len(
+                            content
+                        )
+            self.completed.put(result)
+
+    def submit(
+        self,
+        result: FileResult,
+        content: bytes | None = None,
+        original: bytes | None = None,
+    ) -> None:
+        """
+        Queue the result of a file, with the replacement of its content.
+
+        Parameters
+        ----------
+        result : FileResult
+            Result of the file, replaced by a failed result if the file
+            cannot be written.
+        content : bytes or None, optional (default=None)
+            New raw content of the file, if it is to be rewritten.
+        original : bytes or None, optional (default=None)
+            Content saved to `path + "--"` first, if given.
+
+        """
+        self.queue.put((result, content, original))
+
+    def iter_completed(self) -> Iterator[FileResult]:
+        """Yield the results of the files written so far, in order."""
+        while True:
+            try:
+                yield self.completed.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self) -> None:
+        """Wait for the pending writes."""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        if self.stats is not None and self.write_stats is not None:
+            self.stats.merge(self.write_stats)
+            self.write_stats = None
+
+
+def _process_content(
+    job: tuple[str, bytes, LineRanges | None],
+    profile: bool,
+    timeout: float | None,
+) -> tuple[str, bytes | None, str | None, Stats | None]:
+    path, data, line_ranges = job
+    start = time.perf_counter()
+    stats = Stats() if profile else None
+    try:
+        with time_limit(timeout):
+            status, encoded, key = process_content(data, stats, line_ranges)
+    except Exception as e:
+        # The error takes the place of the key.
+        return "failed", None, describe_error(e), stats
+    finally:
+        if stats is not None:
+            stats.files[path] = time.perf_counter() - start
+    # Only rewritten files send their content back.
+    return status, encoded if status == "processed" else None, key, stats
+
+
+def _broken_content(
+    job: tuple[str, bytes, LineRanges | None], error: Exception
+) -> tuple[str, None, str, None]:
+    return "failed", None, describe_error(error), None
+
+
+def process_paths_pipelined(
+    paths: Iterable[str],
+    jobs: int = 1,
+    cache: ResultCache | None = None,
+    backup: bool = False,
+    stats: Stats | None = None,
+    changes: dict[str, LineRanges] | None = None,
+    io_threads: int = DEFAULT_IO_THREADS,
+    queue_depth: int = DEFAULT_QUEUE_DEPTH,
+    timeout: float | None = None,
+    engine: str = "processes",
+) -> Iterator[FileResult]:
+    """
+    Process files like `process_paths`, overlapping I/O with processing.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Paths to the Python source files, consumed lazily.
+    jobs : int, optional (default=1)
+        Number of worker processes. With a single job, files are processed
+        in the calling process.
+    cache : ResultCache or None, optional (default=None)
+        Cache of the contents left unchanged by processing, updated with
+        the content of every processed file.
+    backup : bool, optional (default=False)
+        Whether to keep a copy of the original content of rewritten files.
+    stats : Stats or None, optional (default=None)
+        Stats merged with those of every file, if given.
+    changes : dict or None, optional (default=None)
+        Ranges of changed line numbers by path. Only the functions and
+        classes overlapping them are documented.
+    io_threads : int, optional (default=8)
+        Number of threads reading files ahead.
+    queue_depth : int, optional (default=64)
+        Maximum number of files read ahead, and of rewritten files waiting
+        to be written.
+    timeout : float or None, optional (default=None)
+        Seconds given to process each file before it fails.
+    engine : {"processes", "threads"}, optional (default="processes")
+        Whether jobs are worker processes or threads.
+
+    Returns
+    -------
+    iterator of FileResult
+        The result for each path, in input order, once its new content has
+        been written. Files that could not be written are reported with the
+        "failed" status.
+
+    """
+    # Path and raw content of the files in flight, with their result if
+    # they are not processed.
+    pending: deque = deque()
+
+    def iter_jobs() -> Iterator[tuple[str, bytes, LineRanges | None]]:
+        for path, data, error in prefetch(paths, io_threads, queue_depth):
+            if data is None:
+                result = FileResult(path, "failed", None, error=error)
+                pending.append((path, None, result))
+                continue
+            with timed(stats, "cache"):
+                hit = cache is not None and cache.lookup_content(data)
+            if hit:
+                result = FileResult(path, "cached", None)
+                pending.append((path, None, result))
+                continue
+            pending.append((path, data, None))
+            line_ranges = None
+            if changes is not None:
+                line_ranges = changes.get(path, [])
+            yield path, data, line_ranges
+
+    def submit_early_results(writer: BackgroundWriter) -> None:
+        while pending and pending[0][2] is not None:
+            writer.submit(pending.popleft()[2])
+
+    def complete(writer: BackgroundWriter) -> Iterator[FileResult]:
+        for result in writer.iter_completed():
+            if stats is not None:
+                stats.counters["files_" + result.status] += 1
+            # Only contents on disk are known to be clean.
+            if cache is not None and result.key is not None:
+                cache.add(result.key)
+            yield result
+
+    worker = functools.partial(
+        _process_content,
+        profile=stats is not None,
+        timeout=timeout,
+    )
+    results = lazy_map(worker, jobs, iter_jobs(), engine, _broken_content)
+    with BackgroundWriter(queue_depth, stats) as writer:
+        for status, encoded, key, file_stats in results:
+            submit_early_results(writer)
+            path, data, _ = pending.popleft()
+            # Files whose worker died come back without stats.
+            if stats is not None and file_stats is not None:
+                stats.merge(file_stats)
+            if status == "failed":
+                # The error takes the place of the key.
+                writer.submit(FileResult(path, "failed", None, error=key))
+            else:
+                original = data if backup and encoded is not None else None
+                writer.submit(FileResult(path, status, key), encoded, original)
+                if stats is not None:
+                    stats.counters["bytes_read"] += len(data)
+            yield from complete(writer)
+        submit_early_results(writer)
+        writer.close()
+        yield from complete(writer)
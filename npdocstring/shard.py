@@ -0,0 +1,119 @@
+"""Split a set of files into shards of similar total size."""
+import hashlib
+import heapq
+import os
+from collections.abc import Iterable
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """
+    Parse a shard specification.
+
+    Parameters
+    ----------
+    spec : str
+        The 1-based index of the shard and the number of shards, as "i/N".
+
+    Returns
+    -------
+    index : int
+        The 0-based index of the shard.
+    count : int
+        The number of shards.
+
+    """
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"invalid shard {spec!r}, expected i/N") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"invalid shard {spec!r}, expected 1 <= i <= N")
+    return index - 1, count
+
+
+def stable_hash(path: str, root: str | None = None) -> int:
+    if root is not None:
+        path = os.path.relpath(path, root)
+    normalized = os.path.normpath(path).replace(os.sep, "/")
+    digest = hashlib.blake2b(normalized.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def get_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def assign_shards(
+    paths: Iterable[str], count: int, root: str | None = None
+) -> dict[str, int]:
+    """
+    Spread files over shards so that each gets about the same total size.
+
+    Files are assigned from the largest to the smallest, each to the least
+    loaded shard. Ties are broken by a hash of the paths relative to `root`,
+    so that every node given the same files computes the same assignment,
+    wherever its checkout lives.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Paths to the files.
+    count : int
+        Number of shards.
+    root : str or None, optional (default=None)
+        Directory the hashed paths are made relative to, e.g. the root of
+        the discovery or of the repository. Paths are hashed as given if
+        None.
+
+    Returns
+    -------
+    dict
+        The 0-based shard index of each path.
+
+    """
+    files = sorted(
+        (
+            (get_size(path), stable_hash(path, root), path)
+            for path in set(paths)
+        ),
+        key=lambda file: (-file[0], file[1], file[2]),
+    )
+    loads = [(0, index) for index in range(count)]
+    assignment = {}
+    for size, _, path in files:
+        load, index = heapq.heappop(loads)
+        assignment[path] = index
+        heapq.heappush(loads, (load + size, index))
+    return assignment
+
+
+def select_shard(
+    paths: Iterable[str], index: int, count: int, root: str | None = None
+) -> list[str]:
+    """
+    Keep the files of a shard.
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Paths to the files of every shard.
+    index : int
+        The 0-based index of the shard.
+    count : int
+        Number of shards.
+    root : str or None, optional (default=None)
+        Directory the hashed paths are made relative to, see
+        `assign_shards`.
+
+    Returns
+    -------
+    list of str
+        The paths of the shard, in input order.
+
+    """
+    paths = list(paths)
+    assignment = assign_shards(paths, count, root)
+    return [path for path in paths if assignment[path] == index]
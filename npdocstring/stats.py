@@ -0,0 +1,116 @@
+"""Per-stage timings and counters collected while processing files."""
+import contextlib
+import json
+import time
+from collections import Counter
+from collections.abc import Iterator
+
+
+class Stats:
+    """
+    Wall-clock timings and counters of a run.
+
+    Attributes
+    ----------
+    timings : dict
+        Seconds spent in each stage.
+    counters : collections.Counter
+        Counts of nodes, docstrings, bytes, files and cache hits.
+    files : dict
+        Seconds spent processing each file.
+
+    """
+
+    def __init__(self) -> None:
+        self.timings: dict[str, float] = {}
+        self.counters: Counter[str] = Counter()
+        self.files: dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Add the time spent in the `with` block to `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[stage] = self.timings.get(stage, 0.0) + elapsed
+
+    def merge(self, other: "Stats") -> None:
+        """Add the timings and counters of `other` to these."""
+        for stage, seconds in other.timings.items():
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+        self.counters.update(other.counters)
+        for path, seconds in other.files.items():
+            self.files[path] = self.files.get(path, 0.0) + seconds
+
+    def to_dict(self, n_files: int | None = None) -> dict:
+        """
+        Convert the stats to a JSON serializable dictionary.
+
+        Parameters
+        ----------
+        n_files : int or None, optional (default=None)
+            Only keep this many of the slowest files.
+
+        Returns
+        -------
+        dict
+            Timings, counters and per-file timings.
+
+        """
+        files = sorted(self.files.items(), key=lambda item: -item[1])
+        return {
+            "timings": dict(self.timings),
+            "counters": dict(self.counters),
+            "files": dict(files[:n_files]),
+        }
+
+    def dump(self, path: str) -> None:
+        """Write the stats as JSON to `path`."""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self, n_files: int = 10) -> str:
+        """
+        Format the stats as a human readable table.
+
+        Parameters
+        ----------
+        n_files : int, optional (default=10)
+            Number of slowest files to list.
+
+        Returns
+        -------
+        str
+            The table.
+
+        """
+        data = self.to_dict(n_files)
+        total = sum(self.timings.values()) or 1.0
+        lines = ["{:<32}{:>12}{:>8}".format("stage", "ms", "%")]
+        for stage, seconds in data["timings"].items():
+            lines.append(
+                "{:<32}{:>12.3f}{:>8.1f}".format(
+                    stage, seconds * 1e3, 100 * seconds / total
+                )
+            )
+        lines.append("")
+        lines.append("{:<32}{:>12}".format("counter", "value"))
+        for name, value in sorted(data["counters"].items()):
+            lines.append("{:<32}{:>12}".format(name, value))
+        if data["files"]:
+            lines.append("")
+            lines.append("{:<32}{:>12}".format("slowest files", "ms"))
+            for path, seconds in data["files"].items():
+                lines.append("{:<32}{:>12.3f}".format(path, seconds * 1e3))
+        return "\n".join(lines) + "\n"
+
+
+def timed(
+    stats: Stats | None, stage: str
+) -> contextlib.AbstractContextManager:
+    """Time a stage when `stats` are collected, do nothing otherwise."""
+    if stats is None:
+        return contextlib.nullcontext()
+    return stats.timer(stage)
@@ -0,0 +1,152 @@
+"""
+Serve docstring generation requests over newline-delimited JSON.
+
+Each input line is a JSON object holding either the `content` of a file or
+the `path` to one, and optionally an `id` and, along with `path`, `write`
+to rewrite the file in place. Each request gets exactly one output line,
+in order, holding the `id`, whether the content `changed` and the new
+`content` (unless it was written), or an `error`.
+
+Requests giving the `line` or the qualified `name` of a single function or
+class are answered with the `edit` inserting its docstring, or null if it
+already has one.
+"""
+import json
+from collections.abc import Callable
+from typing import IO, Any
+
+from .batch import encode_source, write_file_atomically
+from .npdocstring import (
+    Edit,
+    LineIndex,
+    ParsedFile,
+    parse_file,
+    process_node,
+    process_parsed_file,
+)
+
+
+def edit_to_dict(edit: Edit | None, line_index: LineIndex) -> dict | None:
+    """
+    Describe an edit for JSON serialization.
+
+    Parameters
+    ----------
+    edit : Edit or None
+        The edit.
+    line_index : LineIndex
+        Index of the edited file.
+
+    Returns
+    -------
+    dict or None
+        The `offset` and `text` of the edit, with the `lineno` of the line
+        the text is inserted before.
+
+    """
+    if edit is None:
+        return None
+    return {
+        "offset": edit.offset,
+        "lineno": line_index.lineno(edit.offset),
+        "text": edit.text,
+    }
+
+
+def handle_request(
+    request: dict[str, Any],
+    parse: Callable[[str], ParsedFile] | None = None,
+) -> dict[str, Any]:
+    """
+    Process a single request.
+
+    Parameters
+    ----------
+    request : dict
+        The decoded request.
+    parse : callable or None, optional (default=None)
+        Function parsing file contents, which may serve them from a cache.
+        If None, contents are parsed with `parse_file`, only describing the
+        targeted node of line and name requests.
+
+    Returns
+    -------
+    dict
+        The response.
+
+    """
+    response: dict[str, Any] = {"id": request.get("id")}
+    path = request.get("path")
+    if "content" in request:
+        file_content = request["content"]
+    elif path is not None:
+        with open(path, "r") as f:
+            file_content = f.read()
+    else:
+        raise ValueError("request needs either a content or a path")
+    if "line" in request or "name" in request:
+        if parse is None:
+            parsed = parse_file(file_content, describe=False)
+        else:
+            parsed = parse(file_content)
+        edit = process_node(
+            parsed, lineno=request.get("line"), qualname=request.get("name")
+        )
+        response["edit"] = edit_to_dict(edit, parsed.line_index)
+        return response
+    parsed = (parse or parse_file)(file_content)
+    new_file_content = process_parsed_file(parsed)
+    response["changed"] = new_file_content != file_content
+    if path is not None and request.get("write", False):
+        if response["changed"]:
+            write_file_atomically(path, encode_source(new_file_content))
+    else:
+        response["content"] = new_file_content
+    return response
+
+
+def serve(
+    stdin: IO[str],
+    stdout: IO[str],
+    parse: Callable[[str], ParsedFile] | None = None,
+) -> int:
+    """
+    Answer every request read from `stdin` until it is closed.
+
+    Failing requests are answered with an error and do not stop the loop.
+
+    Parameters
+    ----------
+    stdin : file object
+        Stream of requests, one JSON object per line.
+    stdout : file object
+        Stream where responses are written, one JSON object per line.
+    parse : callable or None, optional (default=None)
+        Function parsing file contents, which may serve them from a cache,
+        see `handle_request`.
+
+    Returns
+    -------
+    int
+        Number of failed requests.
+
+    """
+    n_errors = 0
+    for line in stdin:
+        if not line.strip():
+            continue
+        request: dict[str, Any] = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            response = handle_request(request, parse)
+        except Exception as e:
+            n_errors += 1
+            response = {
+                "id": request.get("id") if isinstance(request, dict) else None,
+                "error": "{}: {}".format(type(e).__name__, e),
+            }
+        stdout.write(json.dumps(response) + "\n")
+        stdout.flush()
+    return n_errors
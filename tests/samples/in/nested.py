@@ -0,0 +1,40 @@
+import sys
+
+if sys.version_info >= (3, 11):
+
+    def guarded_function() -> None:
+        pass
+
+
+class Outer:
+    """Outer class."""
+
+    def __init__(self, a: int) -> None:
+        self.a = a
+        self.b = a + 1
+
+    class Inner:
+        def method(self) -> None:
+            pass
+
+
+def factory(x: int) -> int:
+    class Local:
+        pass
+
+    def helper() -> int:
+        try:
+
+            def deep() -> int:
+                return x
+
+        finally:
+            pass
+        return deep()
+
+    return helper()
+
+
+def test_something() -> None:
+    def hidden() -> None:
+        pass
@@ -0,0 +1,8 @@
+from npdocstring.npdocstring import Edit, apply_edits
+
+
+def test_apply_edits():
+    text = "abcdef"
+    edits = [Edit(4, "Y"), Edit(0, "X"), Edit(4, "Z"), Edit(6, "!")]
+    assert apply_edits(text, edits) == "XabcdYZef!"
+    assert apply_edits(text, []) == text
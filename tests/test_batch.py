@@ -0,0 +1,143 @@
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from npdocstring.batch import lazy_map, ordered_map, process_paths, time_limit
+from npdocstring.npdocstring import process_file
+from npdocstring.stats import Stats
+
+
+@pytest.mark.parametrize("engine", ["processes", "threads"])
+def test_process_paths_parallel(tmp_path, engine):
+    file_content = open("tests/samples/in/pandas.py").read()
+    expected = process_file(file_content)
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"module_{i}.py"
+        path.write_text(file_content)
+        paths.append(str(path))
+    results = list(process_paths(paths, jobs=2, backup=True, engine=engine))
+    assert [result.path for result in results] == paths
+    assert all(result.status == "processed" for result in results)
+    for path in paths:
+        assert open(path).read() == expected
+        assert open(path + "--").read() == file_content
+
+
+def test_process_paths_writes_only_changed_files(tmp_path):
+    documented = tmp_path / "documented.py"
+    documented.write_text(open("tests/samples/out/pandas.py").read())
+    undocumented = tmp_path / "undocumented.py"
+    undocumented.write_text(open("tests/samples/in/pandas.py").read())
+    undocumented.chmod(0o640)
+    mtime = documented.stat().st_mtime_ns
+    paths = [str(documented), str(undocumented)]
+    results = list(process_paths(paths, jobs=1))
+    assert [result.status for result in results] == ["unchanged", "processed"]
+    assert documented.stat().st_mtime_ns == mtime
+    assert undocumented.stat().st_mode & 0o777 == 0o640
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "documented.py",
+        "undocumented.py",
+    ]
+
+
+def test_process_paths_isolates_failures(tmp_path):
+    paths = []
+    for name, content in [
+        ("a.py", "def f(:\n"),
+        ("b.py", open("tests/samples/in/pandas.py").read()),
+        ("c.py", b"\xff\xfe\x00def f(): pass\n"),
+    ]:
+        path = tmp_path / name
+        if isinstance(content, bytes):
+            path.write_bytes(content)
+        else:
+            path.write_text(content)
+        paths.append(str(path))
+    paths.append(str(tmp_path / "missing.py"))
+    stats = Stats()
+    results = list(process_paths(paths, jobs=2, stats=stats))
+    assert [result.status for result in results] == [
+        "failed",
+        "processed",
+        "failed",
+        "failed",
+    ]
+    assert results[0].error.startswith("SyntaxError")
+    assert results[3].error.startswith("FileNotFoundError")
+    assert stats.counters["files_failed"] == 3
+
+
+def test_time_limit():
+    with pytest.raises(TimeoutError):
+        with time_limit(0.05):
+            while True:
+                pass
+    with time_limit(None):
+        pass
+
+
+def test_process_file_on_threads():
+    paths = sorted(glob.glob("tests/samples/in/*.py"))
+    file_contents = [open(path).read() for path in paths] * 4
+    expected = [process_file(file_content) for file_content in file_contents]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(process_file, file_contents)) == expected
+
+
+def exit_on_negative(x, y=0):
+    if x < 0:
+        os._exit(1)
+    return x + y
+
+
+@pytest.mark.parametrize("map_func", [lazy_map, ordered_map])
+def test_map_isolates_dead_workers(map_func):
+    items = list(range(40))
+    items[20] = -1
+    results = list(
+        map_func(
+            exit_on_negative,
+            2,
+            items,
+            on_broken=lambda item, e: type(e).__name__,
+        )
+    )
+    expected = list(range(40))
+    expected[20] = "BrokenProcessPool"
+    assert results == expected
+    with pytest.raises(BrokenProcessPool):
+        list(map_func(exit_on_negative, 2, items))
+
+
+def log_and_exit_on_negative(x, log_path):
+    if x < 0:
+        # The other worker is done with its items by the time this one dies.
+        time.sleep(0.5)
+        os._exit(1)
+    with open(log_path, "a") as f:
+        f.write(f"{x}\n")
+    return x
+
+
+def test_ordered_map_runs_finished_items_once(tmp_path):
+    log_path = str(tmp_path / "log")
+    items = list(range(40))
+    items[20] = -1
+    results = list(
+        ordered_map(
+            log_and_exit_on_negative,
+            2,
+            items,
+            [log_path] * len(items),
+            on_broken=lambda item, e: None,
+        )
+    )
+    assert results == [None if x < 0 else x for x in items]
+    logged = sorted(map(int, open(log_path).read().split()))
+    assert logged == sorted(x for x in items if x >= 0)
@@ -0,0 +1,67 @@
+import pytest
+
+from npdocstring.batch import process_paths
+from npdocstring.cache import ResultCache, content_key
+from npdocstring.pipeline import process_paths_pipelined
+
+
+def test_content_key_depends_on_content():
+    assert content_key(b"x = 1\n") == content_key(b"x = 1\n")
+    assert content_key(b"x = 1\n") != content_key(b"x = 2\n")
+
+
+def test_cache_eviction(tmp_path):
+    cache_file = str(tmp_path / "cache.json")
+    cache = ResultCache(cache_file, max_entries=2)
+    for key in ["a", "b", "c"]:
+        cache.add(key)
+    cache.add("a")
+    cache.save()
+    cache = ResultCache(cache_file, max_entries=2)
+    assert list(cache.keys) == ["c", "a"]
+
+
+def test_cache_skips_processed_files(tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text(open("tests/samples/in/pandas.py").read())
+    cache_file = str(tmp_path / "cache.json")
+    cache = ResultCache(cache_file)
+    results = list(process_paths([str(path)], jobs=1, cache=cache))
+    assert results[0].status == "processed"
+    cache.save()
+    cache = ResultCache(cache_file)
+    results = list(process_paths([str(path)], jobs=1, cache=cache))
+    assert results[0].status == "cached"
+    assert cache.hits == 1
+
+
+@pytest.mark.parametrize("engine", ["processes", "threads"])
+def test_cache_lookups_in_workers(tmp_path, engine):
+    file_content = open("tests/samples/in/pandas.py").read()
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"module_{i}.py"
+        path.write_text(file_content)
+        paths.append(str(path))
+    cache = ResultCache(str(tmp_path / "cache.json"))
+    results = list(process_paths(paths, jobs=2, cache=cache, engine=engine))
+    assert [result.status for result in results] == ["processed"] * 4
+    assert len(cache) == 1
+    (tmp_path / "module_3.py").write_text(file_content)
+    results = list(process_paths(paths, jobs=2, cache=cache, engine=engine))
+    assert [result.status for result in results] == ["cached"] * 3 + [
+        "processed"
+    ]
+    assert cache.hits == 3
+
+
+@pytest.mark.parametrize("run", [process_paths, process_paths_pipelined])
+def test_cache_hits_crlf_files(tmp_path, run):
+    documented = open("tests/samples/out/pandas.py").read()
+    path = tmp_path / "module.py"
+    path.write_bytes(documented.replace("\n", "\r\n").encode())
+    cache = ResultCache(str(tmp_path / "cache.json"))
+    results = list(run([str(path)], jobs=1, cache=cache))
+    assert results[0].status == "unchanged"
+    results = list(run([str(path)], jobs=1, cache=cache))
+    assert results[0].status == "cached"
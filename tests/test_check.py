@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from npdocstring.__main__ import main
+from npdocstring.check import (
+    MissingDocstring,
+    check_file,
+    check_paths,
+    make_sarif_report,
+)
+
+FILE_CONTENT = '''\
+class A:
+    """Documented."""
+
+    def method(self):
+        pass
+
+
+@decorator
+def f(x):
+    def inner():
+        pass
+
+    return inner
+'''
+
+
+def test_check_file():
+    total, missing = check_file(FILE_CONTENT)
+    assert total == 4
+    assert missing == [
+        MissingDocstring(4, "A.method", "method"),
+        MissingDocstring(9, "f", "function"),
+        MissingDocstring(10, "f.inner", "function"),
+    ]
+
+
+def test_check_file_in_line_ranges():
+    total, missing = check_file(FILE_CONTENT, [(5, 5)])
+    assert total == 1
+    assert missing == [MissingDocstring(4, "A.method", "method")]
+
+
+@pytest.mark.parametrize("engine", ["processes", "threads"])
+def test_check_paths(tmp_path, engine):
+    paths = []
+    for i, content in enumerate([FILE_CONTENT, '"""x"""\n', "def f(:\n"]):
+        path = tmp_path / f"module_{i}.py"
+        path.write_text(content)
+        paths.append(str(path))
+    reports = list(check_paths(paths, jobs=2, engine=engine))
+    assert [report.path for report in reports] == paths
+    assert [report.total for report in reports] == [4, 0, 0]
+    assert [len(report.missing) for report in reports] == [3, 0, 0]
+    assert reports[2].error.startswith("SyntaxError")
+    sarif = make_sarif_report(reports)
+    results = sarif["runs"][0]["results"]
+    assert [result["level"] for result in results] == ["warning"] * 3 + [
+        "error"
+    ]
+
+
+def test_main_check(tmp_path, capsys):
+    path = tmp_path / "module.py"
+    path.write_text(FILE_CONTENT)
+    report_path = tmp_path / "report.json"
+    argv = ["--check", "--dir", str(tmp_path), "--report", str(report_path)]
+    assert main(argv) == 1
+    assert path.read_text() == FILE_CONTENT
+    out = capsys.readouterr().out
+    assert f"{path}:4: method A.method has no docstring" in out
+    report = json.loads(report_path.read_text())
+    assert report["files"][0]["documented"] == 1
+    assert report["summary"]["missing"] == 3
+    path.write_text('"""Module."""\n')
+    assert main(["--check", "--dir", str(tmp_path)]) == 0
@@ -0,0 +1,63 @@
+import os
+import socket
+import threading
+
+import pytest
+
+from npdocstring.daemon import DaemonServer, ParsedFileCache, request
+from npdocstring.npdocstring import process_file
+
+
+def test_parsed_file_cache():
+    cache = ParsedFileCache(max_entries=2)
+    first = cache.parse("def a():\n    pass\n")
+    cache.parse("def b():\n    pass\n")
+    assert cache.parse("def a():\n    pass\n") is first
+    cache.parse("def c():\n    pass\n")
+    assert len(cache) == 2
+    assert cache.hits == 1
+    assert cache.parse("def a():\n    pass\n") is first
+    assert cache.hits == 2
+
+
+def test_daemon(tmp_path):
+    file_content = open("tests/samples/in/pandas.py").read()
+    socket_path = str(tmp_path / "npdocstring.sock")
+    with DaemonServer(socket_path) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            for _ in range(2):
+                response = request(
+                    socket_path, {"id": 1, "content": file_content}
+                )
+                assert response == {
+                    "id": 1,
+                    "changed": True,
+                    "content": process_file(file_content),
+                }
+            assert server.cache.hits == 1
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+def test_daemon_keeps_other_files(tmp_path):
+    path = tmp_path / "npdocstring.sock"
+    path.write_text("not a socket")
+    with pytest.raises(FileExistsError):
+        DaemonServer(str(path))
+    assert path.read_text() == "not a socket"
+
+
+def test_daemon_replaces_only_stale_sockets(tmp_path):
+    socket_path = str(tmp_path / "npdocstring.sock")
+    with DaemonServer(socket_path):
+        with pytest.raises(FileExistsError):
+            DaemonServer(socket_path)
+    assert not os.path.exists(socket_path)
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+    with DaemonServer(socket_path):
+        assert os.path.exists(socket_path)
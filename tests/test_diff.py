@@ -0,0 +1,77 @@
+import difflib
+import glob
+import subprocess
+
+import pytest
+
+from npdocstring.__main__ import main
+from npdocstring.diff import diff_file, iter_diffs
+from npdocstring.npdocstring import process_file
+
+
+def make_diff(file_content):
+    return "".join(
+        difflib.unified_diff(
+            file_content.splitlines(keepends=True),
+            process_file(file_content).splitlines(keepends=True),
+            "a/module.py",
+            "b/module.py",
+        )
+    )
+
+
+def test_diff_file_matches_difflib():
+    for path in sorted(glob.glob("tests/samples/in/*.py")):
+        file_content = open(path).read()
+        assert diff_file(file_content, "module.py") == make_diff(file_content)
+
+
+def test_diff_file_without_final_newline():
+    diff = diff_file("def f(x):\n    return x", "module.py")
+    assert diff.endswith("     return x\n\\ No newline at end of file\n")
+    assert diff_file('def f(x):\n    """Doc."""\n', "module.py") == ""
+
+
+@pytest.mark.parametrize("engine", ["processes", "threads"])
+def test_iter_diffs(tmp_path, engine):
+    paths = []
+    for i, content in enumerate(["def f(x):\n    return x\n", "def f(:\n"]):
+        path = tmp_path / f"module_{i}.py"
+        path.write_text(content)
+        paths.append(str(path))
+    diffs = list(iter_diffs(paths, jobs=2, engine=engine, root=tmp_path))
+    assert [file_diff.path for file_diff in diffs] == paths
+    assert diffs[0].diff == diff_file(open(paths[0]).read(), "module_0.py")
+    assert diffs[0].error is None
+    assert diffs[1].error.startswith("SyntaxError")
+
+
+def test_main_diff(tmp_path, capsys):
+    file_content = open("tests/samples/in/pandas.py").read()
+    paths = [tmp_path / "a.py", tmp_path / "b.py"]
+    for path in paths:
+        path.write_text(file_content)
+    assert main(["--diff", *map(str, paths)]) == 0
+    out = capsys.readouterr().out
+    assert out.count("--- a/") == 2
+    assert all(path.read_text() == file_content for path in paths)
+
+
+def test_main_diff_headers(tmp_path, monkeypatch, capsys):
+    file_content = "def f(x):\n    return x\n"
+    (tmp_path / "pkg").mkdir()
+    path = tmp_path / "pkg" / "a.py"
+    path.write_text(file_content)
+    outside = tmp_path.parent / f"{tmp_path.name}_outside.py"
+    outside.write_text(file_content)
+    monkeypatch.chdir(tmp_path)
+    assert main(["--diff", str(path), str(outside)]) == 0
+    out = capsys.readouterr().out
+    assert "--- a/pkg/a.py\n+++ b/pkg/a.py\n" in out
+    outside_path = str(outside).lstrip("/")
+    assert f"--- a/{outside_path}\n" in out
+    subprocess.run(["git", "init", "-q"], check=True)
+    (tmp_path / "pkg" / "sub").mkdir()
+    monkeypatch.chdir(tmp_path / "pkg" / "sub")
+    assert main(["--diff", str(path)]) == 0
+    assert "--- a/pkg/a.py\n" in capsys.readouterr().out
@@ -0,0 +1,83 @@
+from npdocstring.discovery import (
+    iter_python_files,
+    translate_gitignore_pattern,
+)
+
+
+def make_tree(tmp_path, names):
+    for name in names:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+
+
+def relative_paths(tmp_path, **options):
+    return [
+        path[len(str(tmp_path)) + 1 :]
+        for path in iter_python_files(str(tmp_path), **options)
+    ]
+
+
+def test_iter_python_files(tmp_path):
+    make_tree(tmp_path, ["z.py", "a/y.py", "a/c/x.py", "b/w.py", "b/n.txt"])
+    assert relative_paths(tmp_path) == ["z.py", "a/y.py", "a/c/x.py", "b/w.py"]
+
+
+def test_iter_python_files_excludes(tmp_path):
+    make_tree(
+        tmp_path,
+        [
+            "a.py",
+            ".venv/lib/site.py",
+            "node_modules/x/y.py",
+            "build/lib/a.py",
+            "pkg/a.py",
+            "pkg/gen/b.py",
+            "pkg/test_a.py",
+        ],
+    )
+    assert relative_paths(tmp_path) == [
+        "a.py",
+        "pkg/a.py",
+        "pkg/test_a.py",
+        "pkg/gen/b.py",
+    ]
+    assert relative_paths(tmp_path, exclude=["pkg/gen", "test_*"]) == [
+        "a.py",
+        ".venv/lib/site.py",
+        "build/lib/a.py",
+        "node_modules/x/y.py",
+        "pkg/a.py",
+    ]
+
+
+def test_iter_python_files_gitignore(tmp_path):
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".gitignore").write_text(
+        "# comment\n/top.py\ngen/\n*_pb2.py\n"
+    )
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / ".gitignore").write_text("*.py\n!keep.py\n")
+    make_tree(
+        tmp_path,
+        [
+            "top.py",
+            "src/top.py",
+            "src/gen/a.py",
+            "src/a_pb2.py",
+            "src/pkg/drop.py",
+            "src/pkg/keep.py",
+        ],
+    )
+    assert relative_paths(tmp_path) == ["src/top.py", "src/pkg/keep.py"]
+    src = tmp_path / "src"
+    assert relative_paths(src) == ["top.py", "pkg/keep.py"]
+    assert len(relative_paths(tmp_path, gitignore=False)) == 6
+
+
+def test_translate_gitignore_pattern():
+    regex = translate_gitignore_pattern("a/**/b")
+    assert regex.match("a/b") and regex.match("a/x/y/b")
+    assert not regex.match("x/a/b")
+    regex = translate_gitignore_pattern("[!a]?.py")
+    assert regex.match("d/bc.py") and not regex.match("ab.py")
@@ -1,11 +1,33 @@
-from npdocstring.npdocstring import get_funclassdef_nodes
+import ast
+
+from npdocstring.npdocstring import collect_funclassdefs, get_funclassdef_nodes
 
 
 def test_get_funclassdef_nodes():
     file_content = open("tests/samples/in/basic.py").read()
     fcnodes = get_funclassdef_nodes(file_content)
-    assert len(fcnodes) == 4
+    assert len(fcnodes) == 5
     assert fcnodes[0].name == "basic_function"
     assert fcnodes[1].name == "BasicClass"
     assert fcnodes[2].name == "basic_method"
     assert fcnodes[3].name == "basic_async_method"
+    assert fcnodes[4].name == "nested_method"
+
+
+def test_collect_funclassdefs():
+    file_content = open("tests/samples/in/nested.py").read()
+    records = collect_funclassdefs(ast.parse(file_content))
+    assert [(r.qualname, r.kind, r.has_docstring) for r in records] == [
+        ("guarded_function", "function", False),
+        ("Outer", "class", True),
+        ("Outer.Inner", "class", False),
+        ("Outer.Inner.method", "method", False),
+        ("factory", "function", False),
+        ("factory.Local", "class", False),
+        ("factory.helper", "function", False),
+        ("factory.helper.deep", "function", False),
+    ]
+    assert records[0].returns == "None"
+    assert records[1].arguments is None
+    assert records[2].arguments is None
+    assert records[4].arguments[0].name == "x"
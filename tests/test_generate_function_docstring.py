@@ -43,7 +43,7 @@ list of int
 def test_basic_function():
     file_content = open("tests/samples/in/basic.py").read()
     fcnodes = get_funclassdef_nodes(file_content)
-    assert len(fcnodes) == 4
+    assert len(fcnodes) == 5
     assert fcnodes[0].name == "basic_function"
     assert generate_function_docstring(fcnodes[0]) == BASIC_FUNCTION_EXPECTED
 
@@ -8,7 +8,7 @@ from npdocstring.npdocstring import (
 def test_get_function_arguments():
     file_content = open("tests/samples/in/basic.py").read()
     fcnodes = get_funclassdef_nodes(file_content)
-    assert len(fcnodes) == 4
+    assert len(fcnodes) == 5
     args = get_function_arguments(fcnodes[0])
     assert len(args) == 1
     assert args[0] == AtrOrArg(name="file_path", hint="str", default=None)
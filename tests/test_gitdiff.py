@@ -0,0 +1,86 @@
+import subprocess
+
+from npdocstring.gitdiff import (
+    get_changed_lines,
+    parse_unified_diff,
+    unquote_path,
+)
+from npdocstring.npdocstring import get_funclassdef_nodes, process_file
+
+DIFF = """diff --git a/pkg/a.py b/pkg/a.py
+--- a/pkg/a.py
++++ b/pkg/a.py
+@@ -3,0 +4,2 @@ def f():
++    x = 1
++    y = 2
+@@ -10 +12 @@ class C:
+-    z = 3
++    z = 4
+@@ -20,2 +21,0 @@ class C:
+-    a = 1
+-    b = 2
+diff --git a/old.py b/old.py
+deleted file mode 100644
+--- a/old.py
++++ /dev/null
+@@ -1 +0,0 @@
+-x = 1
+"""
+
+
+def test_parse_unified_diff():
+    assert parse_unified_diff(DIFF) == {
+        "pkg/a.py": [(4, 5), (12, 12), (21, 21)],
+    }
+
+
+def test_process_file_line_ranges():
+    file_content = open("tests/samples/in/basic.py").read()
+    output = process_file(file_content, line_ranges=[(12, 12)])
+    fcnodes = get_funclassdef_nodes(output)
+    assert [node.name for node in fcnodes] == [
+        "basic_function",
+        "BasicClass",
+        "basic_async_method",
+        "nested_method",
+    ]
+
+
+def test_unquote_path():
+    assert unquote_path("b/a b.py\t") == "b/a b.py"
+    assert unquote_path('"b/na\\303\\257ve.py"') == "b/na\u00efve.py"
+    assert unquote_path('"b/say \\"hi\\"\\t.py"') == 'b/say "hi"\t.py'
+    assert unquote_path("b/plain.py") == "b/plain.py"
+
+
+def test_get_changed_lines(tmp_path):
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True)
+
+    git("init", "-q")
+    git("config", "user.email", "test@example.com")
+    git("config", "user.name", "test")
+    path = tmp_path / "module.py"
+    path.write_text("def f():\n    pass\n")
+    git("add", "module.py")
+    git("commit", "-q", "-m", "initial")
+    path.write_text("def f():\n    pass\n\n\ndef g():\n    pass\n")
+    (tmp_path / "notes.txt").write_text("hello\n")
+    assert get_changed_lines("HEAD", cwd=str(tmp_path)) == {
+        str(tmp_path / "module.py"): [(3, 6)]
+    }
+    assert get_changed_lines(staged=True, cwd=str(tmp_path)) == {}
+
+
+def test_get_changed_lines_special_names(tmp_path):
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True)
+
+    git("init", "-q")
+    git("config", "core.quotePath", "true")
+    names = ["a b.py", "na\u00efve.py"]
+    for name in names:
+        (tmp_path / name).write_text("def f():\n    pass\n")
+    git("add", *names)
+    changes = get_changed_lines(staged=True, cwd=str(tmp_path))
+    assert changes == {str(tmp_path / name): [(1, 2)] for name in names}
@@ -0,0 +1,63 @@
+import pytest
+
+from npdocstring.npdocstring import process_file
+
+MULTILINE_SIGNATURE = """class A:
+    @staticmethod
+    def f(
+        a: int,
+    ) -> None:
+        # comment
+
+        pass
+"""
+
+MULTILINE_SIGNATURE_EXPECTED = '''class A:
+    """
+    FIXME"""
+    @staticmethod
+    def f(
+        a: int,
+    ) -> None:
+        # comment
+
+        """
+        FIXME
+
+        Parameters
+        ----------
+        a : int
+            FIXME
+
+        Returns
+        -------
+        None
+            FIXME
+
+        """
+        pass
+'''
+
+
+def test_multiline_signature_and_decorators():
+    assert process_file(MULTILINE_SIGNATURE) == MULTILINE_SIGNATURE_EXPECTED
+
+
+def test_tab_indentation():
+    file_content = "def f():\n\tpass\n"
+    assert (
+        process_file(file_content) == 'def f():\n\t"""\n\tFIXME"""\n\tpass\n'
+    )
+
+
+def test_one_line_body_is_left_alone():
+    file_content = "def f(): pass\n\n\nclass A: x = 1\n"
+    assert process_file(file_content) == file_content
+
+
+def test_indentation_spaces_is_deprecated():
+    file_content = "def f():\n  pass\n"
+    with pytest.warns(DeprecationWarning):
+        assert process_file(file_content, 4) == process_file(file_content)
+    with pytest.raises(TypeError):
+        process_file(file_content, 4, None)
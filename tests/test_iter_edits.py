@@ -0,0 +1,53 @@
+import itertools
+
+from npdocstring import apply_edits, iter_edits, iter_missing
+from npdocstring.npdocstring import process_file
+
+
+def make_tree(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    undocumented = open("tests/samples/in/pandas.py").read()
+    documented = open("tests/samples/out/pandas.py").read()
+    paths = []
+    for name, content in [
+        ("a.py", undocumented),
+        ("b.py", documented),
+        ("pkg/c.py", undocumented),
+    ]:
+        path = tmp_path / name
+        path.write_text(content)
+        paths.append(str(path))
+    return paths
+
+
+def test_iter_edits(tmp_path):
+    paths = make_tree(tmp_path)
+    for jobs in [1, 2]:
+        results = list(iter_edits([str(tmp_path)], jobs=jobs))
+        assert [result.path for result in results] == [paths[0], paths[2]]
+        for result in results:
+            assert open(result.path).read() == result.content
+            assert apply_edits(result.content, result.edits) == process_file(
+                result.content
+            )
+
+
+def test_iter_edits_is_lazy(tmp_path):
+    paths = make_tree(tmp_path)
+    read = []
+
+    def iter_paths():
+        for path in paths:
+            read.append(path)
+            yield path
+
+    first = next(iter_edits(iter_paths()))
+    assert first.path == paths[0]
+    assert read == paths[:1]
+
+
+def test_iter_missing(tmp_path):
+    paths = make_tree(tmp_path)
+    reports = list(itertools.islice(iter_missing(paths, jobs=2), 1))
+    assert [report.path for report in reports] == paths[:1]
+    assert reports[0].missing[0].qualname == "my_fun"
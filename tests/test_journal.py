@@ -0,0 +1,61 @@
+import os
+import time
+
+from npdocstring.__main__ import main
+from npdocstring.batch import FileResult, write_file_atomically
+from npdocstring.journal import Journal
+
+
+def test_journal_resume(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("def f():\n    pass\n")
+    journal_path = str(tmp_path / "journal")
+    with Journal(journal_path) as journal:
+        journal.record(FileResult(str(path), "processed", None))
+        journal.record(FileResult(str(tmp_path / "b.py"), "failed", None))
+    with open(journal_path, "a") as f:
+        f.write('{"path": "truncated')
+    with Journal(journal_path) as journal:
+        assert str(path) in journal
+        assert str(tmp_path / "b.py") not in journal
+        path.write_text("def f():\n    return 1\n")
+        assert str(path) not in journal
+
+
+def test_main_journal(tmp_path, capsys):
+    source = tmp_path / "src"
+    source.mkdir()
+    content = open("tests/samples/in/pandas.py").read()
+    for name in ["a.py", "b.py"]:
+        (source / name).write_text(content)
+    (source / "c.py").write_text("def f(:\n")
+    journal_path = str(tmp_path / "journal")
+    argv = ["--dir", str(source), "--journal", journal_path, "-j", "1"]
+    assert main(argv) == 1
+    captured = capsys.readouterr()
+    assert captured.out.count("processed") == 2
+    assert "failed {}: SyntaxError".format(source / "c.py") in captured.err
+    os.utime(source / "a.py", ns=(0, 0))
+    assert main(argv) == 1
+    captured = capsys.readouterr()
+    assert captured.out.splitlines() == [
+        "skipped 1 files done in {}".format(journal_path)
+    ]
+    assert "c.py" in captured.err
+
+
+def test_main_journal_pipelined_after_write(tmp_path, monkeypatch):
+    def slow_write(path, content):
+        time.sleep(0.2)
+        write_file_atomically(path, content)
+
+    monkeypatch.setattr(
+        "npdocstring.pipeline.write_file_atomically", slow_write
+    )
+    path = tmp_path / "a.py"
+    path.write_text(open("tests/samples/in/pandas.py").read())
+    journal_path = str(tmp_path / "journal")
+    argv = [str(path), "--journal", journal_path, "--io-threads", "2"]
+    assert main(argv) == 0
+    with Journal(journal_path) as journal:
+        assert str(path) in journal
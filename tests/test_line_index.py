@@ -0,0 +1,9 @@
+from npdocstring.npdocstring import LineIndex
+
+
+def test_line_index():
+    line_index = LineIndex("def f():\r\n    pass\n\n  \nx = 1")
+    assert len(line_index) == 5
+    assert list(line_index.offsets) == [0, 10, 19, 20, 23, 28]
+    assert line_index.line(1) == "    pass\n"
+    assert line_index.slice(1, 3) == "    pass\n\n"
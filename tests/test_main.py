@@ -0,0 +1,48 @@
+import pytest
+
+from npdocstring.__main__ import main
+from npdocstring.npdocstring import process_file
+
+
+def test_main_paths(tmp_path, capsys):
+    content = open("tests/samples/in/pandas.py").read()
+    documented = process_file(content)
+    (tmp_path / "pkg").mkdir()
+    paths = [tmp_path / "a.py", tmp_path / "b.py", tmp_path / "pkg" / "c.py"]
+    for path in paths:
+        path.write_text(content)
+    paths[1].write_text(documented)
+    argv = [str(paths[0]), str(paths[1]), str(tmp_path / "pkg")]
+    assert main(argv) == 0
+    captured = capsys.readouterr()
+    assert captured.out.splitlines() == [
+        f"processed {paths[0]}",
+        f"processed {paths[2]}",
+    ]
+    assert "2 processed, 1 unchanged, 0 cached, 0 failed" in captured.err
+    assert all(path.read_text() == documented for path in paths)
+    (tmp_path / "broken.py").write_text("def f(:\n")
+    assert main(["-j", "2", str(tmp_path / "broken.py"), str(paths[0])]) == 1
+    assert "0 processed, 1 unchanged, 0 cached, 1 failed" in (
+        capsys.readouterr().err
+    )
+
+
+def test_main_paths_conflicts(tmp_path):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "a.py"), "--dir", str(tmp_path)])
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "a.py"), "--since", "HEAD"])
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "a.py"), "--staged"])
+
+
+def test_main_timeout_with_threads(tmp_path):
+    with pytest.raises(SystemExit):
+        main(["--dir", str(tmp_path), "--engine", "threads", "--timeout", "1"])
+
+
+def test_main_target_conflicts(tmp_path):
+    for option in [["--check"], ["--diff"], ["--dir", str(tmp_path)]]:
+        with pytest.raises(SystemExit):
+            main(["--line", "3", *option])
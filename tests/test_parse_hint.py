@@ -1,6 +1,11 @@
+import ast
+
+import pytest
+
 from npdocstring.npdocstring import (
     get_funclassdef_nodes,
     get_function_arguments,
+    parse_hint,
 )
 
 
@@ -38,3 +43,37 @@ def test_parse_union_hint_other():
     args = get_function_arguments(fcnodes[3])
     assert len(args) == 1
     assert args[0].hint == "int or iterable of int"
+
+
+@pytest.mark.parametrize(
+    "annotation, expected",
+    [
+        ("dict[str, int]", "dict of str to int"),
+        ("typing.Dict[str, List[int]]", "dict of str to list of int"),
+        ("Optional[int]", "int or None"),
+        ("int | str | None", "int or str or None"),
+        ("Callable[[int], str]", "callable"),
+        ("Literal['a', -1]", "{'a', -1}"),
+        ("tuple[int, ...]", "tuple of int"),
+        ("tuple[int, str]", "(int, str)"),
+        ("Annotated[int, Field(gt=0)]", "int"),
+        ("np.ndarray[int]", "np.ndarray"),
+        ("'Forward'", "Forward"),
+    ],
+)
+def test_parse_generic_hint(annotation, expected):
+    assert parse_hint(ast.parse(annotation, mode="eval").body) == expected
+
+
+def test_parse_hint_cache_tells_apart_equal_constants():
+    hints = [
+        parse_hint(ast.parse(annotation, mode="eval").body)
+        for annotation in ["Literal[1]", "Literal[True]", "Literal[1]"]
+    ]
+    assert hints == ["{1}", "{True}", "{1}"]
+
+
+def test_parse_deeply_nested_hint():
+    annotation = "List[" * 150 + "int" + "]" * 150
+    hint = parse_hint(ast.parse(annotation, mode="eval").body)
+    assert hint == "list of " * 150 + "int"
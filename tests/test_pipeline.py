@@ -0,0 +1,166 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import npdocstring.npdocstring
+from npdocstring.batch import FileResult
+from npdocstring.cache import ResultCache
+from npdocstring.npdocstring import process_file
+from npdocstring.pipeline import (
+    BackgroundWriter,
+    prefetch,
+    process_paths_pipelined,
+)
+from npdocstring.stats import Stats
+
+
+def make_files(tmp_path, n):
+    undocumented = open("tests/samples/in/pandas.py").read()
+    documented = open("tests/samples/out/pandas.py").read()
+    paths = []
+    for i in range(n):
+        path = tmp_path / f"module_{i}.py"
+        path.write_text(undocumented if i % 2 == 0 else documented)
+        paths.append(str(path))
+    return paths, undocumented
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_process_paths_pipelined(tmp_path, jobs):
+    paths, undocumented = make_files(tmp_path, 6)
+    cache = ResultCache(str(tmp_path / "cache.json"))
+    results = list(
+        process_paths_pipelined(
+            paths, jobs=jobs, cache=cache, backup=True, queue_depth=2
+        )
+    )
+    assert [result.path for result in results] == paths
+    statuses = [result.status for result in results]
+    assert statuses[::2] == ["processed"] * 3
+    # Documented files may be found in the cache once the first file is.
+    assert set(statuses[1::2]) <= {"unchanged", "cached"}
+    expected = process_file(undocumented)
+    for path in paths:
+        assert open(path).read() == expected
+    assert open(paths[0] + "--").read() == undocumented
+    results = list(process_paths_pipelined(paths, jobs=jobs, cache=cache))
+    assert all(result.status == "cached" for result in results)
+
+
+def test_prefetch_is_bounded(tmp_path):
+    paths, _ = make_files(tmp_path, 10)
+    consumed = []
+
+    def iter_paths():
+        for path in paths:
+            consumed.append(path)
+            yield path
+
+    files = prefetch(iter_paths(), threads=2, depth=3)
+    path, data, error = next(files)
+    assert path == paths[0] and data == open(path, "rb").read()
+    assert error is None
+    assert len(consumed) == 3
+    files.close()
+
+
+def test_background_writer_failures(tmp_path):
+    path = str(tmp_path / "missing" / "a.py")
+    written = str(tmp_path / "a.py")
+    open(written, "w").close()
+    with BackgroundWriter(depth=1) as writer:
+        writer.submit(FileResult(path, "processed", "key"), b"")
+        writer.submit(FileResult(written, "processed", "key"), b"x = 1\n")
+        writer.submit(FileResult(path, "unchanged", "key"))
+    results = list(writer.iter_completed())
+    assert [result.status for result in results] == [
+        "failed",
+        "processed",
+        "unchanged",
+    ]
+    assert results[0].error.startswith("FileNotFoundError")
+    assert open(written).read() == "x = 1\n"
+
+
+def test_process_paths_pipelined_write_failures(tmp_path, monkeypatch):
+    paths, _ = make_files(tmp_path, 3)
+
+    def fail(path, content):
+        raise PermissionError("read-only")
+
+    monkeypatch.setattr("npdocstring.pipeline.write_file_atomically", fail)
+    cache = ResultCache(str(tmp_path / "cache.json"))
+    results = list(process_paths_pipelined(paths, cache=cache))
+    assert [result.path for result in results] == paths
+    assert [result.status for result in results] == [
+        "failed",
+        "unchanged",
+        "failed",
+    ]
+    assert results[0].error == "PermissionError: read-only"
+    assert len(cache) == 1
+
+
+def test_process_paths_pipelined_isolates_failures(tmp_path):
+    paths, _ = make_files(tmp_path, 2)
+    broken = tmp_path / "broken.py"
+    broken.write_text("def f(:\n")
+    paths[1:1] = [str(broken), str(tmp_path / "missing.py")]
+    results = list(process_paths_pipelined(paths, jobs=2))
+    assert [result.status for result in results] == [
+        "processed",
+        "failed",
+        "failed",
+        "unchanged",
+    ]
+    assert results[1].error.startswith("SyntaxError")
+    assert results[2].error.startswith("FileNotFoundError")
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="workers must inherit the patched function",
+)
+def test_process_paths_pipelined_dead_worker(tmp_path, monkeypatch):
+    get_file_edits = npdocstring.npdocstring.get_file_edits
+
+    def exit_on_crash(file_content, **options):
+        if "CRASH" in file_content:
+            os._exit(1)
+        return get_file_edits(file_content, **options)
+
+    monkeypatch.setattr(
+        "npdocstring.npdocstring.get_file_edits", exit_on_crash
+    )
+    paths, _ = make_files(tmp_path, 4)
+    (tmp_path / "module_1.py").write_text("# CRASH\ndef f():\n    pass\n")
+    stats = Stats()
+    results = list(process_paths_pipelined(paths, jobs=2, stats=stats))
+    assert [result.status for result in results] == [
+        "processed",
+        "failed",
+        "processed",
+        "unchanged",
+    ]
+    assert results[1].error.startswith("BrokenProcessPool")
+    assert stats.counters["files_failed"] == 1
+    assert stats.counters["files_processed"] == 2
+
+
+def test_process_paths_pipelined_file_times(tmp_path, monkeypatch):
+    get_file_edits = npdocstring.npdocstring.get_file_edits
+
+    def slow_get_file_edits(file_content, **options):
+        time.sleep(0.05)
+        return get_file_edits(file_content, **options)
+
+    monkeypatch.setattr(
+        "npdocstring.npdocstring.get_file_edits", slow_get_file_edits
+    )
+    paths, _ = make_files(tmp_path, 2)
+    stats = Stats()
+    list(process_paths_pipelined(paths, stats=stats))
+    assert sorted(stats.files) == paths
+    assert all(seconds >= 0.05 for seconds in stats.files.values())
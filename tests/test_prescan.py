@@ -0,0 +1,40 @@
+import pytest
+
+from npdocstring.npdocstring import get_funclassdef_nodes, may_lack_docstrings
+
+DOCUMENTED = [
+    "",
+    "x = 1\n",
+    'def f():\n    """Doc."""\n',
+    'def f(): "Doc."\n',
+    "async def f(\n    a: int = 1,  # comment: with colon\n"
+    ") -> dict[str, int]:\n    # comment\n\n"
+    "    r'''Doc.\n\n    More.'''\n    return {}\n",
+    'class A(B, metaclass=M):\n    """Doc."""\n\n    def __init__(self):\n'
+    "        pass\n\n    def m(self, f=lambda x: x[1:]):\n        u'doc'\n",
+    "def test_something():\n    pass\n",
+    "def f(a=\"):\", b='''\n:'''):\n    \"Doc.\"\r\n",
+]
+
+MAY_LACK = [
+    "def f():\n    pass\n",
+    'def f():\n    "Doc.".format()\n',
+    'def f():\n    b"Doc."\n',
+    'def f():\n    f"Doc."\n',
+    'def f():\n    "Doc." "More."\n',
+    'class A:\n    """Doc."""\n\n    def test_m(self):\n        pass\n',
+    'def f():\n    """Doc."""\n\n    def g():\n        pass\n',
+    'x = """\ndef fake():\n"""\n',
+    "def f(a=(\n",
+]
+
+
+@pytest.mark.parametrize("file_content", DOCUMENTED)
+def test_documented(file_content):
+    assert not may_lack_docstrings(file_content)
+    assert get_funclassdef_nodes(file_content) == []
+
+
+@pytest.mark.parametrize("file_content", MAY_LACK)
+def test_may_lack(file_content):
+    assert may_lack_docstrings(file_content)
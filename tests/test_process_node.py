@@ -0,0 +1,42 @@
+from npdocstring.npdocstring import apply_edits, process_file, process_node
+
+METHOD_EXPECTED = '''        """
+        FIXME
+
+        Returns
+        -------
+        None
+            FIXME
+
+        """
+'''
+
+
+def test_process_node_by_line():
+    file_content = open("tests/samples/in/basic.py").read()
+    edit = process_node(file_content, lineno=14)
+    assert edit.text == METHOD_EXPECTED
+    assert file_content[edit.offset :].startswith("        def nested_method")
+    assert process_node(file_content, lineno=20) is None
+    assert process_node(file_content, lineno=1) is None
+
+
+def test_process_node_by_name():
+    file_content = open("tests/samples/in/basic.py").read()
+    edit = process_node(file_content, qualname="BasicClass.basic_method")
+    assert edit == process_node(file_content, lineno=11)
+    assert process_node(file_content, qualname="BasicClass.missing") is None
+    function_edit = process_node(file_content, qualname="basic_function")
+    assert apply_edits(file_content, [function_edit]).startswith(
+        process_file(file_content)[: function_edit.offset + 100]
+    )
+
+
+def test_process_node_in_compound_statements():
+    file_content = open("tests/samples/in/nested.py").read()
+    edit = process_node(file_content, lineno=6)
+    assert edit == process_node(file_content, qualname="guarded_function")
+    assert file_content[edit.offset :].startswith("        pass")
+    edit = process_node(file_content, lineno=28)
+    assert edit == process_node(file_content, qualname="factory.helper.deep")
+    assert file_content[edit.offset :].startswith("                return x")
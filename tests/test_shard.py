@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+from npdocstring.__main__ import main
+from npdocstring.shard import assign_shards, parse_shard, select_shard
+
+
+def test_parse_shard():
+    assert parse_shard("1/3") == (0, 3)
+    assert parse_shard("3/3") == (2, 3)
+    for spec in ["0/3", "4/3", "1", "a/b"]:
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_assign_shards(tmp_path):
+    paths = []
+    for i, size in enumerate([900, 500, 400, 300, 200, 100, 100, 100]):
+        path = tmp_path / f"{i}.py"
+        path.write_text("#" * size)
+        paths.append(str(path))
+    assignment = assign_shards(paths, 2)
+    loads = [0, 0]
+    for i, path in enumerate(paths):
+        loads[assignment[path]] += len(open(path).read())
+    assert abs(loads[0] - loads[1]) <= 100
+    assert assign_shards(reversed(paths), 2) == assignment
+    shards = [select_shard(paths, i, 3) for i in range(3)]
+    assert sorted(sum(shards, [])) == sorted(paths)
+    assert all(shard == sorted(shard, key=paths.index) for shard in shards)
+
+
+def test_assign_shards_relative_to_root(tmp_path):
+    assignments = []
+    for checkout in ["a", "somewhere/else/b"]:
+        root = tmp_path / checkout
+        (root / "pkg").mkdir(parents=True)
+        paths = []
+        for i in range(16):
+            path = root / "pkg" / f"{i}.py"
+            path.write_text("pass\n")
+            paths.append(str(path))
+        assignment = assign_shards(paths, 4, str(root))
+        assignments.append(
+            {os.path.relpath(path, root): assignment[path] for path in paths}
+        )
+    assert assignments[0] == assignments[1]
+    assert len(set(assignments[0].values())) == 4
+
+
+def test_merge_reports(tmp_path, capsys):
+    for i in range(4):
+        (tmp_path / f"m{i}.py").write_text("def f():\n    pass\n" * (i + 1))
+    report_paths = []
+    for i in range(1, 3):
+        report_path = str(tmp_path / f"report_{i}.json")
+        argv = ["--check", "--shard", f"{i}/2", "--report", report_path]
+        assert main(argv + ["--dir", str(tmp_path)]) == 1
+        report_paths.append(report_path)
+    capsys.readouterr()
+    merged_path = str(tmp_path / "merged.json")
+    argv = ["merge-reports", *report_paths, "--report", merged_path]
+    assert main(argv) == 1
+    merged = json.load(open(merged_path))
+    assert [entry["path"] for entry in merged["files"]] == [
+        str(tmp_path / f"m{i}.py") for i in range(4)
+    ]
+    assert merged["summary"]["missing"] == 10
+    assert "0/10 functions and classes" in capsys.readouterr().err
@@ -0,0 +1,34 @@
+from npdocstring.batch import process_paths
+from npdocstring.npdocstring import process_file
+from npdocstring.stats import Stats
+
+
+def test_process_file_stats():
+    file_content = open("tests/samples/in/basic.py").read()
+    stats = Stats()
+    assert process_file(file_content, stats=stats) == process_file(
+        file_content
+    )
+    assert set(stats.timings) == {
+        "prescan",
+        "index",
+        "discover",
+        "render",
+        "splice",
+    }
+    assert stats.counters["docstrings"] == 5
+    assert stats.counters["lines"] == 31
+
+
+def test_process_paths_stats(tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text(open("tests/samples/in/pandas.py").read())
+    stats = Stats()
+    list(process_paths([str(path)], jobs=1, stats=stats))
+    assert stats.counters["files_processed"] == 1
+    assert stats.counters["bytes_read"] == len(
+        open("tests/samples/in/pandas.py", "rb").read()
+    )
+    assert stats.counters["bytes_written"] == path.stat().st_size
+    assert list(stats.to_dict()["files"]) == [str(path)]
+    assert "discover" in stats.summary()
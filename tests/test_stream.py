@@ -0,0 +1,56 @@
+import io
+import json
+
+import npdocstring.npdocstring
+from npdocstring.npdocstring import process_file
+from npdocstring.stream import handle_request, serve
+
+
+def test_serve(tmp_path):
+    file_content = open("tests/samples/in/pandas.py").read()
+    expected = process_file(file_content)
+    path = tmp_path / "module.py"
+    path.write_text(file_content)
+    requests = [
+        json.dumps({"id": 1, "content": file_content}),
+        "",
+        "[1, 2]",
+        json.dumps({"id": 3, "path": str(path), "write": True}),
+        json.dumps({"id": 4, "content": expected}),
+    ]
+    stdout = io.StringIO()
+    n_errors = serve(io.StringIO("\n".join(requests)), stdout)
+    assert n_errors == 1
+    responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert responses[0] == {"id": 1, "changed": True, "content": expected}
+    assert responses[1]["id"] is None and "error" in responses[1]
+    assert responses[2] == {"id": 3, "changed": True}
+    assert path.read_text() == expected
+    assert responses[3] == {"id": 4, "changed": False, "content": expected}
+
+
+def test_serve_targeted_request():
+    file_content = open("tests/samples/in/basic.py").read()
+    request = {"id": 1, "content": file_content, "name": "BasicClass"}
+    stdout = io.StringIO()
+    assert serve(io.StringIO(json.dumps(request)), stdout) == 0
+    edit = json.loads(stdout.getvalue())["edit"]
+    assert edit["lineno"] == 11
+    assert edit["text"] == '    """\n    FIXME"""\n'
+
+
+def test_targeted_request_describes_one_node(monkeypatch):
+    get_function_arguments = npdocstring.npdocstring.get_function_arguments
+    described = []
+
+    def record_arguments(node):
+        described.append(node.name)
+        return get_function_arguments(node)
+
+    monkeypatch.setattr(
+        "npdocstring.npdocstring.get_function_arguments", record_arguments
+    )
+    file_content = open("tests/samples/in/basic.py").read()
+    request = {"content": file_content, "name": "basic_function"}
+    assert handle_request(request)["edit"] is not None
+    assert described == ["basic_function"]